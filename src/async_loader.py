@@ -0,0 +1,161 @@
+from concurrent.futures import Executor
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sections.registry import SECTION_PARSERS
+from utils.string_pool import StringPool
+from wmset import MIN_FILE_SIZE, OFFSET_TABLE_SIZE, SECTION_COUNT, WmsetFile
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+import weakref
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+Range = Tuple[int, int]  # offset, size
+
+def _read_range(path: str, offset: int, size: int) -> bytes:
+  ## pread does not move a shared file position, so each range can use its own descriptor without seeking
+  fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+  try:
+    if hasattr(os, "pread"):
+      data = os.pread(fd, size, offset)
+    else:
+      os.lseek(fd, offset, os.SEEK_SET)
+      data = os.read(fd, size)
+  finally:
+    os.close(fd)
+  if len(data) != size:
+    raise ValueError(f"{path}: expected {size} bytes at offset {offset:#x}, read {len(data)}")
+  return data
+
+def split_ranges(offsets: Sequence[int], file_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Range]:
+  """
+  Byte ranges covering everything after the offset table, one per section and
+  split into chunk_size pieces so a single large section still reads in parallel.
+  """
+  boundaries = sorted({OFFSET_TABLE_SIZE, file_size, *(offset for offset in offsets if OFFSET_TABLE_SIZE <= offset <= file_size)})
+  ranges: List[Range] = []
+  for start, end in zip(boundaries, boundaries[1:]):
+    for chunk in range(start, end, chunk_size):
+      ranges.append((chunk, min(chunk_size, end - chunk)))
+  return ranges
+
+def decode(file_data: bytes, path: str, string_pool: Optional[StringPool], hardened: bool, indices: Sequence[int]) -> WmsetFile:
+  """
+  Split and parse file_data. Module level so a ProcessPoolExecutor can pickle it, in which
+  case string_pool is a copy in the worker and the parsed file is pickled back.
+  """
+  wmset = WmsetFile.from_bytes(file_data, path, string_pool, hardened)
+  for index in indices:
+    wmset.section(index)
+  return wmset
+
+
+class AsyncLoader:
+  """
+  Loads wmset files without blocking the event loop. The offset table is read first,
+  then every section's byte range is read concurrently in io_executor, with at most
+  concurrency reads in flight across all files sharing this loader on the same event loop.
+  Parsing runs in decode_executor, which can be a ProcessPoolExecutor, so one file can
+  decode while the next is still being read. Executors default to the loop's default executor.
+  """
+  def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               io_executor: Optional[Executor] = None, decode_executor: Optional[Executor] = None,
+               string_pool: Optional[StringPool] = None, hardened: bool = False):
+    if concurrency < 1:
+      raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    self.concurrency = concurrency
+    self.chunk_size = chunk_size
+    self.io_executor = io_executor
+    self.decode_executor = decode_executor
+    self.string_pool = string_pool
+    self.hardened = hardened
+    ## A semaphore is bound to the loop it is first used on, so each running loop gets its own
+    self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+  @property
+  def semaphore(self) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = self._semaphores.get(loop)
+    if semaphore is None:
+      semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+    return semaphore
+
+  async def read_range(self, path: str, offset: int, size: int) -> bytes:
+    async with self.semaphore:
+      return await asyncio.get_running_loop().run_in_executor(self.io_executor, _read_range, path, offset, size)
+
+  async def read_file(self, path: str) -> bytearray:
+    """The whole file, assembled from concurrent range reads."""
+    loop = asyncio.get_running_loop()
+    try:
+      file_size = (await loop.run_in_executor(self.io_executor, os.stat, path)).st_size
+    except FileNotFoundError:
+      raise FileNotFoundError(f"File {path} does not exist") from None
+    if file_size < MIN_FILE_SIZE:
+      raise ValueError(f"File too short: {file_size} bytes")
+
+    header = await self.read_range(path, 0, OFFSET_TABLE_SIZE)
+    offsets = struct.unpack(f"<{SECTION_COUNT}I", header)
+    ranges = split_ranges(offsets, file_size, self.chunk_size)
+    chunks = await asyncio.gather(*(self.read_range(path, offset, size) for offset, size in ranges))
+
+    file_data = bytearray(file_size)
+    file_data[:OFFSET_TABLE_SIZE] = header
+    for (offset, size), chunk in zip(ranges, chunks):
+      file_data[offset:offset + size] = chunk
+    return file_data
+
+  async def load(self, path: str, sections: Optional[Iterable[int]] = None) -> WmsetFile:
+    """
+    Read path and parse the given sections in decode_executor before returning.
+    sections=None parses every section with a parser, pass () to only split the file.
+    """
+    file_data = await self.read_file(path)
+    indices = list(SECTION_PARSERS if sections is None else sections)
+    return await asyncio.get_running_loop().run_in_executor(
+      self.decode_executor, decode, file_data, path, self.string_pool, self.hardened, indices)
+
+  async def load_many(self, paths: Iterable[str], sections: Optional[Iterable[int]] = None,
+                      return_exceptions: bool = False) -> List[WmsetFile]:
+    """Load every path at once, sharing the concurrency limit. Results are in the order of paths."""
+    indices = None if sections is None else list(sections)
+    return await asyncio.gather(*(self.load(path, indices) for path in paths), return_exceptions=return_exceptions)
+
+
+async def open_wmset_async(path: str, sections: Optional[Iterable[int]] = None, string_pool: Optional[StringPool] = None,
+                           hardened: bool = False) -> WmsetFile:
+  return await AsyncLoader(string_pool=string_pool, hardened=hardened).load(path, sections)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Load wmset files with the async loader and compare against loading them one by one")
+  parser.add_argument("files", nargs="+")
+  parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+  parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+  parser.add_argument("--hardened", action="store_true")
+  args = parser.parse_args()
+
+  start = time.perf_counter()
+  for path in args.files:
+    try:
+      wmset = WmsetFile(path, hardened=args.hardened)
+      for index in SECTION_PARSERS:
+        wmset.section(index)
+    except (FileNotFoundError, ValueError):
+      pass
+  serial = time.perf_counter() - start
+
+  loader = AsyncLoader(args.concurrency, args.chunk_size, hardened=args.hardened)
+  start = time.perf_counter()
+  results = asyncio.run(loader.load_many(args.files, return_exceptions=True))
+  concurrent = time.perf_counter() - start
+
+  failed = [(path, result) for path, result in zip(args.files, results) if isinstance(result, BaseException)]
+  for path, error in failed:
+    print(f"{path}: {error}", file=sys.stderr)
+  print(f"{len(args.files)} file(s): {serial * 1000:.1f} ms one by one, {concurrent * 1000:.1f} ms async")
+  sys.exit(1 if failed else 0)
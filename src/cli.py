@@ -0,0 +1,180 @@
+from typing import List, Optional, Sequence, TYPE_CHECKING
+from wmset import SCRIPT_SECTIONS, WmsetFile, open_wmset
+import argparse
+import sys
+
+if TYPE_CHECKING:
+  from utils.memory import MemoryBudget
+
+DEFAULT_FILE = "../wmsetus.obj"
+DEFAULT_OUTPUT = "../output"
+
+## Each command only touches the sections it prints, so nothing else gets parsed
+
+def cmd_names(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  for name in wmset.location_names:
+    print(escape(name))
+
+def cmd_dialog(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  for text in wmset.dialog:
+    print(escape(text))
+
+def cmd_drawpoints(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  for point in wmset.draw_points:
+    print(f"{point.x}\t{point.y}\t{point.magicId}")
+
+def cmd_scripts(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  for index in args.section or SCRIPT_SECTIONS:
+    for e, entity in enumerate(wmset.scripts(index).entities):
+      for s, script in enumerate(entity.scripts):
+        for opcode in script.opcodes:
+          print(f"{index}\t{e}\t{s}\t{opcode.code}\t{opcode.param1}\t{opcode.param2}")
+
+def cmd_export_models(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  from export import export_models
+  budget = make_budget(args, wmset, (15, 41))
+  with make_writer(args) as writer:
+    export_models(wmset.models, wmset.textures, writer, budget)
+  report_budget(budget)
+
+def cmd_export_textures(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  from export import export_textures
+  budget = make_budget(args, wmset, (41,))
+  with make_writer(args) as writer:
+    export_textures(wmset.textures, writer, args.mipmaps, args.downscale or (), budget)
+  report_budget(budget)
+
+def cmd_thumbnails(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  from export import export_thumbnails
+  budget = make_budget(args, wmset, (15, 41))
+  with make_writer(args) as writer:
+    export_thumbnails(wmset.models, wmset.textures, writer, args.size)
+  if budget:
+    budget.check("thumbnails")
+  report_budget(budget)
+
+def cmd_batch(args: argparse.Namespace) -> None:
+  from main import process_batch
+  process_batch(args.files, args.archive_dir, args.format, args.memory_budget_mb)
+
+def cmd_ndjson(wmset: WmsetFile, args: argparse.Namespace) -> None:
+  from ndjson_export import iter_records, write_ndjson
+  records = iter_records(wmset, args.kind)
+  source = wmset.path if args.with_source else None
+  if args.out:
+    with open(args.out, "w", encoding="utf-8") as f:
+      write_ndjson(records, f, source)
+  else:
+    write_ndjson(records, sys.stdout, source)
+
+def make_budget(args: argparse.Namespace, wmset: WmsetFile, sections: Sequence[int]) -> Optional["MemoryBudget"]:
+  """
+  With --memory-budget-mb, parse the sections up front and free their bytes and streams,
+  so only the parsed records stay resident while exporting.
+  """
+  if not args.memory_budget_mb:
+    return None
+  from utils.memory import MemoryBudget
+  budget = MemoryBudget(args.memory_budget_mb)
+  for index in sections:
+    wmset.section(index)
+    wmset.header.release_section(index)
+    budget.check(f"section {index} of {wmset.path}")
+  if 41 in sections:
+    wmset.textures.release_streams()
+  return budget
+
+def report_budget(budget: Optional["MemoryBudget"]) -> None:
+  if budget:
+    print(budget.report())
+
+def make_writer(args: argparse.Namespace):
+  from utils.output_writer import ArchiveWriter, BackgroundWriter, DirectoryWriter
+  if args.archive:
+    return ArchiveWriter(args.archive)
+  if args.background:
+    return BackgroundWriter(args.output)
+  return DirectoryWriter(args.output)
+
+def escape(text: str) -> str:
+  """Keep multi-line strings on one line so output can be piped."""
+  return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+  parser = argparse.ArgumentParser(prog="wmset", description="Read FF8 wmset.obj files")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  def add_command(name: str, handler, help: str) -> argparse.ArgumentParser:
+    command = subparsers.add_parser(name, help=help)
+    command.add_argument("file", nargs="?", default=DEFAULT_FILE, help=f"wmset file (default {DEFAULT_FILE})")
+    command.set_defaults(handler=handler)
+    return command
+
+  add_command("names", cmd_names, "location names (section 31)")
+  add_command("dialog", cmd_dialog, "dialog text (section 13)")
+  add_command("drawpoints", cmd_drawpoints, "draw points as x, y, magic id (section 34)")
+  scripts = add_command("scripts", cmd_scripts, "script opcodes as section, entity, script, opcode, param1, param2")
+  scripts.add_argument("--section", type=int, action="append", choices=SCRIPT_SECTIONS, help="only this script section, can be repeated")
+
+  ndjson = add_command("ndjson", cmd_ndjson, "names, dialog, draw points and script instructions as one JSON record per line")
+  ndjson.add_argument("--kind", action="append", choices=("names", "dialog", "drawpoints", "scripts"), help="only these records, can be repeated")
+  ndjson.add_argument("--out", help="write to this file instead of stdout")
+  ndjson.add_argument("--with-source", action="store_true", help="add the input path to every record")
+
+  for name, handler, help in (
+    ("export-models", cmd_export_models, "models as obj/mtl/png (sections 15 and 41)"),
+    ("export-textures", cmd_export_textures, "textures as png (section 41)"),
+    ("thumbnails", cmd_thumbnails, "textured preview png of every model (sections 15 and 41)"),
+  ):
+    export = add_command(name, handler, help)
+    export.add_argument("--output", default=DEFAULT_OUTPUT, help=f"output folder (default {DEFAULT_OUTPUT})")
+    export.add_argument("--archive", help="write everything into this .zip/.tar/.tar.gz instead")
+    export.add_argument("--background", action="store_true", help="flush files on background threads")
+    export.add_argument("--memory-budget-mb", type=float, help="free buffers as soon as they are used and stop if RSS goes over this many MiB")
+    if name == "export-textures":
+      export.add_argument("--mipmaps", action="store_true", help="also write every mip level down to 1x1 as texture_N_mipK.png")
+      export.add_argument("--downscale", type=int, action="append", metavar="FACTOR", help="also write a copy shrunk by FACTOR as texture_N_divFACTOR.png, can be repeated")
+    if name == "thumbnails":
+      export.add_argument("--size", type=int, default=128, help="thumbnail width and height in pixels (default 128)")
+
+  batch = subparsers.add_parser("batch", help="export every file to its own archive, optionally within a memory budget")
+  batch.add_argument("files", nargs="+", help="wmset files")
+  batch.add_argument("--archive-dir", default=DEFAULT_OUTPUT, help=f"folder for the archives (default {DEFAULT_OUTPUT})")
+  batch.add_argument("--format", default="zip", choices=("zip", "tar", "tar.gz"), help="archive format (default zip)")
+  batch.add_argument("--memory-budget-mb", type=float, help="free buffers as soon as they are used and stop if RSS goes over this many MiB")
+  batch.set_defaults(handler=None)
+
+  return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+  from utils.memory import MemoryBudgetExceeded
+  args = build_parser().parse_args(argv)
+  if args.command == "batch":
+    try:
+      cmd_batch(args)
+    except (FileNotFoundError, ValueError, MemoryBudgetExceeded) as e:
+      print(e, file=sys.stderr)
+      return 1
+    return 0
+
+  try:
+    wmset = open_wmset(args.file)
+  except (FileNotFoundError, ValueError) as e:
+    print(e, file=sys.stderr)
+    return 1
+
+  try:
+    args.handler(wmset, args)
+  except BrokenPipeError:
+    ## Piped into head or similar, nothing left to do
+    sys.stderr.close()
+  except MemoryBudgetExceeded as e:
+    print(e, file=sys.stderr)
+    return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,185 @@
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from sections.registry import SECTION_PARSERS
+from wmset import SCRIPT_SECTIONS, TEXT_SECTIONS, WmsetFile, open_wmset
+import hashlib
+import json
+import sys
+
+@dataclass
+class RecordChange:
+  change: str  # "changed", "added" or "removed"
+  index: int
+  detail: str
+
+@dataclass
+class SectionDiff:
+  section: int
+  old_size: int
+  new_size: int
+  changes: List[RecordChange] = field(default_factory=list)
+
+@dataclass
+class WmsetDiff:
+  old_path: str
+  new_path: str
+  sections: List[SectionDiff] = field(default_factory=list)
+
+  @property
+  def identical(self) -> bool:
+    return not self.sections
+
+  def to_dict(self) -> Dict[str, Any]:
+    return asdict(self)
+
+  def __str__(self) -> str:
+    if self.identical:
+      return f"{self.new_path}: identical to {self.old_path}"
+    lines = [f"{self.new_path} vs {self.old_path}: {len(self.sections)} section(s) differ"]
+    for section in self.sections:
+      lines.append(f"  section {section.section}: {section.old_size} -> {section.new_size} bytes")
+      for change in section.changes:
+        lines.append(f"    {change.change} {change.index}: {change.detail}")
+    return "\n".join(lines)
+
+
+def _digest(*parts: bytes) -> bytes:
+  hasher = hashlib.blake2b(digest_size=16)
+  for part in parts:
+    hasher.update(part)
+  return hasher.digest()
+
+def _diff_records(old: Sequence[Any], new: Sequence[Any], key: Callable[[Any], Any], describe: Callable[[Any], str],
+                  compare: Optional[Callable[[Any, Any], str]] = None) -> List[RecordChange]:
+  """
+  Pair records by index and only describe the ones whose keys differ.
+  compare(old, new) describes a changed record, by default both sides are described.
+  """
+  changes: List[RecordChange] = []
+  for i in range(max(len(old), len(new))):
+    if i >= len(old):
+      changes.append(RecordChange("added", i, describe(new[i])))
+    elif i >= len(new):
+      changes.append(RecordChange("removed", i, describe(old[i])))
+    elif key(old[i]) != key(new[i]):
+      detail = compare(old[i], new[i]) if compare else f"{describe(old[i])} -> {describe(new[i])}"
+      changes.append(RecordChange("changed", i, detail))
+  return changes
+
+
+def _model_key(model: Any) -> bytes:
+  parts = [bytes(str((model.triangle_count, model.quad_count, model.texture_page, model.vertex_count)), "ascii")]
+  parts.extend(primitive.data for primitive in model.triangles)
+  parts.extend(primitive.data for primitive in model.quads)
+  parts.extend(vertex.data for vertex in model.vertices)
+  return _digest(*parts)
+
+def _texture_key(tim: Any) -> bytes:
+  return _digest(repr(tim.header).encode(), tim.image_data or b"", tim.palette_data or b"")
+
+def _changed_fields(old: Any, new: Any, names: Iterable[str]) -> List[str]:
+  return [f"{name} {getattr(old, name)} -> {getattr(new, name)}" for name in names if getattr(old, name) != getattr(new, name)]
+
+def _changed_indices(name: str, old: Sequence[Any], new: Sequence[Any], limit: int = 5) -> List[str]:
+  """"triangles 1, 4 changed" for the records present on both sides whose bytes differ."""
+  indices = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+  if not indices:
+    return []
+  listed = ", ".join(str(i) for i in indices[:limit])
+  more = f" and {len(indices) - limit} more" if len(indices) > limit else ""
+  return [f"{name} {listed}{more} changed"]
+
+def _compare_models(old: Any, new: Any) -> str:
+  parts = _changed_fields(old, new, ("triangle_count", "quad_count", "vertex_count", "texture_page"))
+  for name in ("triangles", "quads", "vertices"):
+    parts += _changed_indices(name, [r.data for r in getattr(old, name)], [r.data for r in getattr(new, name)])
+  return ", ".join(parts)
+
+def _compare_textures(old: Any, new: Any) -> str:
+  parts = _changed_fields(old.header, new.header, [f.name for f in fields(old.header)])
+  for name, old_data, new_data, unit in (
+    ("palette", old.palette_data or b"", new.palette_data or b"", 2),
+    ("pixel", old.image_data or b"", new.image_data or b"", 1),
+  ):
+    if len(old_data) != len(new_data):
+      parts.append(f"{name} data {len(old_data)} -> {len(new_data)} bytes")
+    else:
+      ## Palette entries are 16 bit colors, pixels are counted in bytes whatever the bpp
+      changed = sum(old_data[i:i + unit] != new_data[i:i + unit] for i in range(0, len(old_data), unit))
+      if changed:
+        parts.append(f"{changed} of {len(old_data) // unit} {'palette colors' if unit == 2 else 'pixel bytes'} changed")
+  return ", ".join(parts)
+
+def _entity_key(entity: Any) -> Any:
+  return tuple((opcode.code, opcode.param1, opcode.param2) for script in entity.scripts for opcode in script.opcodes)
+
+def _diff_section(index: int, old: WmsetFile, new: WmsetFile) -> List[RecordChange]:
+  if index not in SECTION_PARSERS:
+    return []
+  old_section = old.section(index)
+  new_section = new.section(index)
+
+  if index in TEXT_SECTIONS:
+    old_raw = old_section.raw_dialog if index == 13 else old_section.raw_names
+    new_raw = new_section.raw_dialog if index == 13 else new_section.raw_names
+    old_text = old_section.dialog if index == 13 else old_section.location_names
+    new_text = new_section.dialog if index == 13 else new_section.location_names
+    changes = _diff_records(list(zip(old_raw, old_text)), list(zip(new_raw, new_text)), lambda r: r[0], lambda r: repr(r[1]))
+    for change in changes:
+      ## Usually trailing padding moved, or a digraph was used instead of two characters
+      if change.change == "changed" and old_text[change.index] == new_text[change.index]:
+        change.detail = f"{old_text[change.index]!r}, same text but different bytes"
+    return changes
+  if index == 15:
+    return _diff_records(old_section.models, new_section.models, _model_key, repr, _compare_models)
+  if index == 34:
+    return _diff_records(old_section.draw_points, new_section.draw_points, lambda p: (p.x, p.y, p.magicId), repr)
+  if index == 41:
+    describe = lambda tim: f"{tim.header.img_w}x{tim.header.img_h} bpp={tim.header.bpp}"
+    return _diff_records(old_section.textures, new_section.textures, _texture_key, describe, _compare_textures)
+  if index in SCRIPT_SECTIONS:
+    describe = lambda entity: f"{len(entity.scripts)} scripts, {sum(len(s.opcodes) for s in entity.scripts)} opcodes"
+    return _diff_records(old_section.entities, new_section.entities, _entity_key, describe)
+  return []
+
+
+def diff_wmset(old: WmsetFile, new: WmsetFile) -> WmsetDiff:
+  """
+  Compare two files section hash first, and only parse and walk the records of
+  sections whose bytes differ. Sections without a parser are reported by size only.
+  """
+  result = WmsetDiff(old.path, new.path)
+  for index in range(len(new.header.sections)):
+    if old.section_hashes[index] == new.section_hashes[index]:
+      continue
+    section = SectionDiff(
+      index,
+      old.header.sections[index].getbuffer().nbytes,
+      new.header.sections[index].getbuffer().nbytes,
+    )
+    section.changes = _diff_section(index, old, new)
+    result.sections.append(section)
+  return result
+
+
+def diff_batch(base_path: str, paths: Iterable[str]) -> List[WmsetDiff]:
+  """
+  Diff many builds against one base, e.g. every mod build against retail wmsetus.obj.
+  The base is opened once, so each of its sections is parsed at most once for the whole batch.
+  """
+  base = open_wmset(base_path)
+  return [diff_wmset(base, open_wmset(path)) for path in paths]
+
+
+if __name__ == "__main__":
+  args = sys.argv[1:]
+  as_json = "--json" in args
+  args = [arg for arg in args if arg != "--json"]
+  if len(args) < 2:
+    print("usage: diff.py [--json] <base wmset> <wmset>...", file=sys.stderr)
+    sys.exit(2)
+
+  diffs = diff_batch(args[0], args[1:])
+  for diff in diffs:
+    print(json.dumps(diff.to_dict()) if as_json else diff)
+  sys.exit(0 if all(diff.identical for diff in diffs) else 1)
@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING, Union
+from utils.memory import MemoryBudget
+from utils.output_writer import ArchiveWriter, DirectoryWriter
+
+## Section modules are only needed for annotations, export_models imports Section15 itself
+if TYPE_CHECKING:
+  from sections.section_15 import Section15
+  from sections.section_41 import Section41
+
+Writer = Union[DirectoryWriter, ArchiveWriter]
+
+def export_models(models: "Section15", object_textures: "Section41", writer: Writer, memory_budget: Optional[MemoryBudget] = None) -> None:
+  """
+  Write every model as models/model_N.obj. Textures are deduplicated by content: each distinct
+  TIM is written once as textures/texture_N.png with a shared models/texture_N.mtl, N being the
+  first model that uses it, and every model with the same texture references that material.
+  Model N is textured with texture N, Model.texture_page is not used for the pairing.
+  With a memory budget, each texture's pixels are released as soon as they have been written.
+  """
+  from sections.section_15 import Section15
+  written: Dict[str, int] = {}  # TIM content hash -> texture index written for it
+  for i, model in enumerate(models.models):
+    texture = object_textures.textures[i]
+    shared = written.get(texture.content_hash)
+    if shared is None:
+      shared = written[texture.content_hash] = i
+      writer.write(f"textures/texture_{i}.png", texture.encode_png())
+      writer.write(f"models/texture_{i}.mtl", Section15.build_mtl(f"texture_{i}", f"../textures/texture_{i}.png").encode())
+
+    obj_text, _ = Section15.build_obj(model, texture, f"model_{i}", mtllib=f"texture_{shared}.mtl", material_name=f"texture_{shared}")
+    writer.write(f"models/model_{i}.obj", obj_text.encode())
+    print(f"Exported model_{i}.obj with texture_{shared}.png")
+    if memory_budget:
+      texture.release_pixels()
+      memory_budget.check(f"model {i}")
+
+  print(f"{len(written)} distinct textures for {len(models.models)} models")
+
+def export_textures(object_textures: "Section41", writer: Writer, mipmaps: bool = False, factors: Sequence[int] = (),
+                    memory_budget: Optional[MemoryBudget] = None) -> None:
+  """
+  Write each distinct texture once as textures/texture_N.png, N being its first index.
+  mipmaps adds its full chain as texture_N_mipK.png from full size down to 1x1, and each factor
+  in factors a copy shrunk by that much as texture_N_divF.png. Every texture is decoded once for
+  all of them. Unlike texture_N.png, these use PS1 transparency: 0x0000 is transparent and STP
+  marks semi-transparent texels (see mipmap.ps1_coverage).
+  With a memory budget, each texture's pixels are released as soon as it has been handled.
+  """
+  mips = None
+  if mipmaps or factors:
+    from sections.textures.mipmap import build_mips
+    mips = build_mips(object_textures.textures, None if mipmaps else 0, factors)
+
+  written: Dict[str, int] = {}
+  for i, texture in enumerate(object_textures.textures):
+    first = written.setdefault(texture.content_hash, i)
+    if first != i:
+      print(f"Skipped texture_{i}.png, same as texture_{first}.png")
+    else:
+      _write_texture(writer, i, texture, mips[i] if mips is not None else None)
+    if memory_budget:
+      texture.release_pixels()
+      memory_budget.check(f"texture {i}")
+
+def _write_texture(writer: Writer, i: int, texture: Any, mips: Optional[Tuple[List[Any], Dict[int, Any]]]) -> None:
+  writer.write(f"textures/texture_{i}.png", texture.encode_png())
+  if mips is None:
+    print(f"Exported texture_{i}.png")
+    return
+
+  chain, scaled = mips
+  for level, pixels in enumerate(chain):
+    writer.write(f"textures/texture_{i}_mip{level}.png", _encode_rgba(pixels))
+  for factor, pixels in scaled.items():
+    writer.write(f"textures/texture_{i}_div{factor}.png", _encode_rgba(pixels))
+  print(f"Exported texture_{i}.png with {len(chain)} mip levels and {len(scaled)} downscales")
+
+def _encode_rgba(pixels) -> bytes:
+  from io import BytesIO
+  from PIL import Image
+  buffer = BytesIO()
+  Image.fromarray(pixels, "RGBA").save(buffer, format="PNG")
+  return buffer.getvalue()
+
+def export_thumbnails(models: "Section15", object_textures: "Section41", writer: Writer, size: int = 128) -> None:
+  """
+  Render every model with its texture into thumbnails/model_N.png, all in one batched pass.
+  """
+  from io import BytesIO
+  from PIL import Image
+  from sections.models.thumbnail import render_thumbnails
+
+  thumbnails = render_thumbnails(models.models, object_textures.textures, size)
+  for i, thumbnail in enumerate(thumbnails):
+    buffer = BytesIO()
+    Image.fromarray(thumbnail, "RGBA").save(buffer, format="PNG")
+    writer.write(f"thumbnails/model_{i}.png", buffer.getvalue())
+  print(f"Rendered {len(thumbnails)} thumbnails at {size}x{size}")
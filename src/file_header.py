@@ -1,46 +1,64 @@
 from dataclasses import dataclass
 from typing import List
-from utils.binary_reader import BinaryReader
+from utils.cursor import Cursor
 from io import BytesIO
+import hashlib
+
+SECTION_COUNT = 48
+OFFSET_TABLE_SIZE = SECTION_COUNT * 4
+MIN_FILE_SIZE = 0x800
 
 @dataclass(init=False)
 class FileHeader:
   model_count: int
   sections: List[BytesIO]
   offsets: List[int]
+  header_padding: bytes
 
-  def __init__(self, file_data: bytes):
-      if len(file_data) < 0x800:
+  def __init__(self, file_data: bytes, verbose: bool = True):
+      if len(file_data) < MIN_FILE_SIZE:
           print(f"File too short: {len(file_data)} bytes")
           self.model_count = 0
           return None
 
-      stream = BytesIO(file_data)
+      with Cursor(file_data, "file header") as cursor:
+        self.offsets = self.parse_offsets(cursor, SECTION_COUNT, verbose)
+        
+        ## Check last offset equals current stream position
+        if self.offsets[0] != cursor.position + 4 and verbose:
+            print(f"Warning: First section offset {self.offsets[0]} does not match stream position {cursor.position}")
 
-      self.offsets = self.parse_offsets(stream, 48)
-      
-      ## Check last offset equals current stream position
-      if self.offsets[0] != stream.tell() + 4:
-          print(f"Warning: First section offset {self.offsets[0]} does not match stream position {stream.tell()}")
+        ## Bytes between the offset table and the first section, kept so the file can be written back
+        self.header_padding = file_data[cursor.position:self.offsets[0]]
 
-      self.sections = self.parse_sections(stream, self.offsets)
-      print(f"Parsed {len(self.sections)} sections from file header")
+        self.sections = self.parse_sections(cursor, self.offsets)
+      if verbose:
+        print(f"Parsed {len(self.sections)} sections from file header")
 
-  def parse_offsets(self, stream: BytesIO, count: int) -> List[int]:
-    offsets: List[int] = []
-    for _ in range(count):
-      offsets.append(BinaryReader.read_uint32(stream))
+  def parse_offsets(self, cursor: Cursor, count: int, verbose: bool = True) -> List[int]:
+    offsets = cursor.read_uint32s(count)
     
-    print("Stream position after header parsing:", stream.tell())
+    if verbose:
+      print("Stream position after header parsing:", cursor.position)
     return offsets
 
-  def parse_sections(self, stream: BytesIO, offsets: List[int]) -> List[BytesIO]:
+  def parse_sections(self, cursor: Cursor, offsets: List[int]) -> List[BytesIO]:
     sections: List[BytesIO] = []
     for i, offset in enumerate(offsets):
-      stream.seek(offset)
-      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(stream.getbuffer())
-      section_size = end_offset - offset
-      section_data = BinaryReader.read_bytes(stream, section_size)
+      cursor.seek(offset)
+      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(cursor)
+      section_data = cursor.read_bytes(end_offset - offset)
       sections.append(BytesIO(section_data))
     
     return sections
+
+  def section_hash(self, index: int) -> str:
+    with self.sections[index].getbuffer() as view:
+      return hashlib.blake2b(view, digest_size=16).hexdigest()
+
+  def section_hashes(self) -> List[str]:
+    return [self.section_hash(i) for i in range(len(self.sections))]
+
+  def release_section(self, index: int) -> None:
+    """Free a section's bytes once it has been decoded. Reading it afterwards raises ValueError."""
+    self.sections[index].close()
@@ -0,0 +1,47 @@
+from typing import Dict, List, Protocol, Union
+from file_header import FileHeader
+import struct
+
+class SerializableSection(Protocol):
+  def serialize(self) -> bytes: ...
+
+Replacement = Union[bytes, SerializableSection]
+
+def build_wmset(file_header: FileHeader, replacements: Dict[int, Replacement]) -> List[Union[bytes, memoryview]]:
+  """
+  Lay out a wmset file as a list of chunks, ready to be written or joined.
+  Only the sections in replacements are serialized, every other section is
+  passed through as a view over its original bytes without being decoded.
+  """
+  section_count = len(file_header.sections)
+  for index in replacements:
+    if not 0 <= index < section_count:
+      raise IndexError(f"Section {index} out of range, file has {section_count} sections")
+
+  chunks: List[Union[bytes, memoryview]] = []
+  for index, section in enumerate(file_header.sections):
+    if index in replacements:
+      replacement = replacements[index]
+      data = replacement if isinstance(replacement, (bytes, bytearray)) else replacement.serialize()
+      ## Keep every section 4 byte aligned, the offset tables inside sections assume it
+      chunks.append(bytes(data) + b"\0" * (-len(data) % 4))
+    else:
+      chunks.append(section.getbuffer())
+
+  offsets: List[int] = []
+  position = 4 * section_count + len(file_header.header_padding)
+  for chunk in chunks:
+    offsets.append(position)
+    position += len(chunk)
+
+  header = struct.pack(f"<{section_count}I", *offsets) + file_header.header_padding
+  return [header] + chunks
+
+def patch_wmset(file_header: FileHeader, replacements: Dict[int, Replacement]) -> bytes:
+  return b"".join(build_wmset(file_header, replacements))
+
+def write_wmset(path: str, file_header: FileHeader, replacements: Dict[int, Replacement]) -> None:
+  chunks = build_wmset(file_header, replacements)
+  with open(path, "wb") as f:
+    f.writelines(chunks)
+  print(f"Wrote {path} ({len(replacements)} section(s) rebuilt)")
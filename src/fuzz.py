@@ -0,0 +1,154 @@
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from sections.registry import SECTION_PARSERS
+from wmset import MIN_FILE_SIZE, SECTION_COUNT, WmsetFile
+import argparse
+import io
+import random
+import struct
+import sys
+import time
+import traceback
+
+## Values that tend to break size and offset fields
+INTERESTING_UINT32 = (0, 1, 2, 4, 0x7F, 0x80, 0xFF, 0x100, 0x7FFF, 0x8000, 0xFFFF, 0x10000, 0x7FFFFFFF, 0xFFFFFFFF)
+
+Mutator = Callable[[random.Random, bytearray], None]
+
+def flip_bits(rng: random.Random, data: bytearray) -> None:
+  for _ in range(rng.randint(1, 8)):
+    position = rng.randrange(len(data))
+    data[position] ^= 1 << rng.randrange(8)
+
+def overwrite_uint32(rng: random.Random, data: bytearray) -> None:
+  position = rng.randrange(len(data) // 4) * 4
+  struct.pack_into("<I", data, position, rng.choice(INTERESTING_UINT32 + (len(data), rng.getrandbits(32))))
+
+def corrupt_section_table(rng: random.Random, data: bytearray) -> None:
+  """Point a section's own offset table entries somewhere else, repeated entries included."""
+  start = struct.unpack_from("<I", data, 4 * rng.randrange(SECTION_COUNT))[0]
+  target = rng.choice((4, 8, rng.randrange(1 << 12), 0xFFFF))
+  for i in range(rng.randint(1, 64)):
+    if start + 4 * i + 4 > len(data):
+      break
+    struct.pack_into("<I", data, start + 4 * i, target)
+
+def truncate(rng: random.Random, data: bytearray) -> None:
+  del data[rng.randrange(MIN_FILE_SIZE, len(data) + 1):]
+
+def splice(rng: random.Random, data: bytearray) -> None:
+  """Copy a chunk of the file over another, e.g. a texture header over a model."""
+  size = rng.randint(4, 256)
+  source = rng.randrange(max(len(data) - size, 1))
+  target = rng.randrange(max(len(data) - size, 1))
+  data[target:target + size] = data[source:source + size]
+
+MUTATORS: Dict[str, Mutator] = {
+  "flip_bits": flip_bits,
+  "overwrite_uint32": overwrite_uint32,
+  "corrupt_section_table": corrupt_section_table,
+  "truncate": truncate,
+  "splice": splice,
+}
+
+
+def exercise(data: bytes) -> None:
+  """
+  Parse every section in hardened mode and decode what later stages read,
+  so a bad file has to be rejected here rather than in an exporter.
+  """
+  from sections.models.mesh import IndexedMesh
+  from sections.textures.pixels import decode_rgba
+
+  wmset = WmsetFile.from_bytes(data, "<fuzz>", hardened=True)
+  for index in SECTION_PARSERS:
+    wmset.section(index)
+  for model in wmset.models.models:
+    IndexedMesh.from_model(model)
+  for texture in wmset.textures.textures:
+    decode_rgba(texture)
+
+
+@dataclass
+class FuzzReport:
+  inputs: int = 0
+  accepted: int = 0
+  rejected: int = 0
+  bytes_parsed: int = 0
+  seconds: float = 0.0
+  worst_us_per_kb: float = 0.0
+  worst_input: Optional[bytes] = None
+  crashes: List[Tuple[str, str, bytes]] = field(default_factory=list)  # mutator, traceback, input
+
+  def __str__(self) -> str:
+    lines = [
+      f"{self.inputs} inputs: {self.accepted} parsed, {self.rejected} rejected with ValueError, {len(self.crashes)} crashed",
+      f"Throughput: {self.bytes_parsed / max(self.seconds, 1e-9) / (1024 * 1024):.1f} MiB/s, "
+      f"worst case {self.worst_us_per_kb:.0f} us per KiB",
+    ]
+    for mutator, trace, _ in self.crashes[:5]:
+      lines.append(f"--- crash after {mutator}:\n{trace}")
+    return "\n".join(lines)
+
+
+def fuzz(seed_data: bytes, iterations: int = 1000, seed: int = 0, max_mutations: int = 4) -> FuzzReport:
+  """
+  Mutate seed_data and parse each result. Anything other than a clean parse or a ValueError
+  (OutOfBoundsError included) is a crash. Time per KiB is tracked to catch super linear inputs.
+  """
+  rng = random.Random(seed)
+  report = FuzzReport()
+  names = list(MUTATORS)
+  for _ in range(iterations):
+    data = bytearray(seed_data)
+    applied = [rng.choice(names) for _ in range(rng.randint(1, max_mutations))]
+    for name in applied:
+      MUTATORS[name](rng, data)
+    data = bytes(data)
+
+    start = time.perf_counter()
+    try:
+      ## Parsers print warnings about recoverable damage, which would drown the report
+      with redirect_stdout(io.StringIO()):
+        exercise(data)
+      report.accepted += 1
+    except ValueError:
+      report.rejected += 1
+    except Exception:
+      report.crashes.append(("+".join(applied), traceback.format_exc(), data))
+    elapsed = time.perf_counter() - start
+
+    report.inputs += 1
+    report.bytes_parsed += len(data)
+    report.seconds += elapsed
+    us_per_kb = elapsed * 1e6 / (len(data) / 1024)
+    if us_per_kb > report.worst_us_per_kb:
+      report.worst_us_per_kb = us_per_kb
+      report.worst_input = data
+  return report
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Fuzz the hardened wmset parsers with mutated copies of a file")
+  parser.add_argument("file", nargs="?", default="../wmsetus.obj")
+  parser.add_argument("--iterations", type=int, default=1000)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--save-crashes", metavar="DIR", help="write each crashing input to DIR")
+  args = parser.parse_args()
+
+  with open(args.file, "rb") as f:
+    seed_data = f.read()
+  baseline = time.perf_counter()
+  exercise(seed_data)
+  print(f"Seed file parses in {(time.perf_counter() - baseline) * 1000:.1f} ms")
+
+  report = fuzz(seed_data, args.iterations, args.seed)
+  print(report)
+  if args.save_crashes and report.crashes:
+    import os
+    os.makedirs(args.save_crashes, exist_ok=True)
+    for i, (_, _, data) in enumerate(report.crashes):
+      with open(os.path.join(args.save_crashes, f"crash_{i}.obj"), "wb") as f:
+        f.write(data)
+  sys.exit(1 if report.crashes else 0)
@@ -0,0 +1,64 @@
+from typing import Dict, List, Optional
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+## Modules only exports and renders should need
+HEAVY_MODULES = ("PIL", "numpy", "sections.textures.tim", "sections.models.mesh", "sections.section_15", "sections.section_41")
+
+## What a fresh interpreter runs for each case, module imports are timed from the first import
+CASES = {
+  "import cli": "import cli",
+  "import wmset": "import wmset",
+  "import main": "import main",
+  "cli names": "import cli; cli.main(['names', FILE])",
+  "cli scripts": "import cli; cli.main(['scripts', FILE])",
+  "cli export-textures": "import cli; cli.main(['export-textures', FILE, '--archive', ARCHIVE])",
+}
+
+_PROBE = """
+import contextlib, io, json, sys, time
+FILE, ARCHIVE = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+  exec(sys.argv[3])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in json.loads(sys.argv[4]) if m in sys.modules]}))
+"""
+
+
+def measure(code: str, file: str, archive: str, runs: int = 7) -> Dict[str, object]:
+  """
+  Run code in fresh interpreters and report the median wall time and which heavy modules it loaded.
+  """
+  times: List[float] = []
+  loaded: List[str] = []
+  for _ in range(runs):
+    result = subprocess.run(
+      [sys.executable, "-c", _PROBE, file, archive, code, json.dumps(HEAVY_MODULES)],
+      capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    times.append(sample["seconds"])
+    loaded = sample["loaded"]
+  return {"median_ms": statistics.median(times) * 1000, "loaded": loaded}
+
+
+def run(file: Optional[str] = None, runs: int = 7) -> Dict[str, Dict[str, object]]:
+  file = os.path.abspath(file or "../wmsetus.obj")
+  archive = os.path.join(os.path.dirname(file), "import_bench.zip")
+  cases = {name: code for name, code in CASES.items() if "FILE" not in code or os.path.exists(file)}
+  try:
+    return {name: measure(code, file, archive, runs) for name, code in cases.items()}
+  finally:
+    if os.path.exists(archive):
+      os.remove(archive)
+
+
+if __name__ == "__main__":
+  results = run(sys.argv[1] if len(sys.argv) > 1 else None)
+  for name, result in results.items():
+    loaded = ", ".join(result["loaded"]) if result["loaded"] else "none"
+    print(f"{name:22} {result['median_ms']:8.1f} ms   heavy modules: {loaded}")
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Type
+from file_header import MIN_FILE_SIZE, FileHeader
+from sections.registry import SECTION_PARSERS
+import hashlib
+import os
+import pickle
+import struct
+import sys
+import time
+
+## Layout of the cache file itself, the parsed classes are covered by parser_fingerprint
+CACHE_VERSION = 3
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+## Packages the parsers and the classes they build are defined in, text decoding lives in utils
+PARSER_PACKAGES = ("sections", "utils")
+
+@lru_cache(maxsize=None)
+def parser_fingerprint() -> str:
+  """
+  Hash of the source of every module in the sections and utils packages. The cache pickles
+  parsed sections, whose contents depend on the parsers and on helpers such as the char table,
+  so any edit to them invalidates it instead of serving stale objects.
+  """
+  hasher = hashlib.blake2b(digest_size=16)
+  for package in PARSER_PACKAGES:
+    for root, dirs, files in os.walk(os.path.join(SOURCE_ROOT, package)):
+      dirs.sort()
+      for name in sorted(files):
+        if name.endswith(".py"):
+          path = os.path.join(root, name)
+          hasher.update(os.path.relpath(path, SOURCE_ROOT).encode())
+          with open(path, "rb") as f:
+            hasher.update(f.read())
+  return hasher.hexdigest()
+
+@dataclass(init=False)
+class IncrementalParser:
+  """
+  Re-parses only the sections whose bytes changed since the previous run.
+  Section hashes and parsed results are kept in memory and, if a cache_path
+  is given, pickled to disk so the next process can pick up where this one stopped.
+  """
+  cache_path: Optional[str]
+  hashes: Dict[int, str]
+  results: Dict[int, Any]
+  changed: List[int]
+
+  def __init__(self, cache_path: Optional[str] = None, parsers: Mapping[int, Type] = SECTION_PARSERS):
+    self.cache_path = cache_path
+    self.parsers = parsers
+    self.hashes = {}
+    self.results = {}
+    self.changed = []
+    if cache_path and os.path.exists(cache_path):
+      self.load()
+
+  def parse(self, file_data: bytes) -> Dict[int, Any]:
+    if len(file_data) < MIN_FILE_SIZE:
+      raise ValueError(f"File too short: {len(file_data)} bytes")
+
+    file_header = FileHeader(file_data, verbose=False)
+    self.changed = []
+    for index, parser in self.parsers.items():
+      digest = file_header.section_hash(index)
+      if self.hashes.get(index) == digest and index in self.results:
+        continue
+      self.results[index] = parser(file_header.sections[index])
+      self.hashes[index] = digest
+      self.changed.append(index)
+
+    if self.cache_path and self.changed:
+      self.save()
+    return self.results
+
+  def parse_file(self, filepath: str) -> Dict[int, Any]:
+    with open(filepath, "rb") as f:
+      return self.parse(f.read())
+
+  def load(self) -> None:
+    try:
+      with open(self.cache_path, "rb") as f:
+        cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+      print(f"Warning: Ignoring unreadable cache {self.cache_path}: {e}")
+      return
+
+    if cache.get("version") != CACHE_VERSION or cache.get("parsers") != parser_fingerprint():
+      return
+    self.hashes = cache["hashes"]
+    self.results = cache["results"]
+
+  def save(self) -> None:
+    tmp_path = f"{self.cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+      pickle.dump({"version": CACHE_VERSION, "parsers": parser_fingerprint(), "hashes": self.hashes, "results": self.results}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, self.cache_path)
+
+
+def watch(filepath: str, on_change: Callable[[Dict[int, Any], List[int]], None], interval: float = 0.05, cache_path: Optional[str] = None) -> None:
+  """
+  Poll filepath and call on_change(results, changed_sections) every time it is saved.
+  Runs until interrupted.
+  """
+  parser = IncrementalParser(cache_path)
+  last_stat = None
+  while True:
+    try:
+      stat = os.stat(filepath)
+    except FileNotFoundError:
+      time.sleep(interval)
+      continue
+
+    current = (stat.st_mtime_ns, stat.st_size)
+    if current != last_stat:
+      last_stat = current
+      try:
+        results = parser.parse_file(filepath)
+      except (ValueError, IndexError, struct.error) as e:
+        ## Usually a half-written save, the next poll picks up the finished file
+        print(f"Warning: Could not parse {filepath}: {e}")
+      else:
+        on_change(results, parser.changed)
+    time.sleep(interval)
+
+
+if __name__ == "__main__":
+  def report(results: Dict[int, Any], changed: List[int]) -> None:
+    print(f"Re-parsed sections: {changed if changed else 'none'}")
+
+  watch(sys.argv[1] if len(sys.argv) > 1 else "../wmsetus.obj", report, cache_path=sys.argv[2] if len(sys.argv) > 2 else None)
@@ -1,17 +1,13 @@
 from file_header import FileHeader
-from sections.section_7 import Section7
-from sections.section_9 import Section9
-from sections.section_11 import Section11
-from sections.section_13 import Section13
-from sections.section_15 import Section15
-from sections.section_31 import Section31
-from sections.section_34 import Section34
-from sections.section_36 import Section36
-from sections.section_41 import Section41
+from sections.registry import SECTION_PARSERS
+from utils.memory import MemoryBudget
+from utils.output_writer import ArchiveWriter, BackgroundWriter, DirectoryWriter
+from typing import List, Optional
 import os
+import sys
 
 ## IMPORTANT NOTE: in documentation sections are 1 indexed, in code they are 0 indexed. So section 1 in docs is section 0 in code.
-def process_file(filepath: str) -> None:
+def process_file(filepath: str, background_writes: bool = False, archive_path: Optional[str] = None, memory_budget: Optional[MemoryBudget] = None) -> None:
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File {filepath} does not exist")
 
@@ -19,54 +15,83 @@ def process_file(filepath: str) -> None:
         file_data = f.read()
 
     file_header = FileHeader(file_data)
+    ## FileHeader has its own copy of every section
+    del file_data
+
+    def parse_section(index: int):
+      section = SECTION_PARSERS[index](file_header.sections[index])
+      if memory_budget:
+        file_header.release_section(index)
+        memory_budget.check(f"section {index} of {filepath}")
+      return section
     
     ## Print offsets with index as key
     for i, offset in enumerate(file_header.offsets):
         print(f"Offset {i}: {offset}")
 
     ## Remember, zero indexed! Section 13 in Wiki is section 12 here.
-    scripts = Section7(file_header.sections[7])
+    scripts = parse_section(7)
     print("Scripts:")
     print(f" - {scripts.entities[0].scripts[0]}")
-    scripts = Section9(file_header.sections[9])
+    scripts = parse_section(9)
     print("Scripts:")
     print(f" - {scripts.entities[0].scripts[0]}")
 
-    scripts = Section11(file_header.sections[11])
+    scripts = parse_section(11)
     print("Scripts:")
     print(f" - {scripts.entities[0].scripts[0]}")
 
-    dialog_text = Section13(file_header.sections[13])
+    dialog_text = parse_section(13)
     print("Dialog Texts:")
     for text in dialog_text.dialog:
         print(f" - {text}")
 
-    models = Section15(file_header.sections[15])
+    models = parse_section(15)
 
-    location_names = Section31(file_header.sections[31])
+    location_names = parse_section(31)
     print("Location Names:")
     for name in location_names.location_names:
         print(f" - {name}")
 
-    draw_points = Section34(file_header.sections[34])
+    draw_points = parse_section(34)
     print("Draw Points:")
     for point in draw_points.draw_points:
         print(f" - {point}")
         
 
-    object_textures = Section41(file_header.sections[41])
-    
-    for i, model in enumerate(models.models):
-      texture = object_textures.textures[i]
-      Section15.export_model_to_obj(model, f"../output/models/model_{i}.obj", texture)
-      texture.save_png(f"../output/textures/texture_{i}.png")
-      print(f"Exported model_{i}.obj with texture_{i}.png")
+    object_textures = parse_section(41)
+    if memory_budget:
+      object_textures.release_streams()
+
+    if archive_path:
+      writer = ArchiveWriter(archive_path)
+    elif background_writes:
+      ## Lets the next model decode while the previous one flushes
+      writer = BackgroundWriter("../output")
+    else:
+      writer = DirectoryWriter("../output")
+    from export import export_models
+    with writer:
+      export_models(models, object_textures, writer, memory_budget)
 
-    scripts = Section36(file_header.sections[36])
+    scripts = parse_section(36)
     print("Scripts:")
     print(f" - {scripts.entities[0].scripts[0]}")
 
+def process_batch(filepaths: List[str], archive_dir: str = "../output", archive_format: str = "zip", memory_budget_mb: Optional[float] = None) -> None:
+    """
+    Export each wmset variant to a single <name>.<archive_format> in archive_dir.
+    With memory_budget_mb set, buffers are released as soon as they are decoded or
+    written and the run stops if RSS goes over the budget.
+    """
+    memory_budget = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
+    for filepath in filepaths:
+      name = os.path.splitext(os.path.basename(filepath))[0]
+      process_file(filepath, archive_path=os.path.join(archive_dir, f"{name}.{archive_format}"), memory_budget=memory_budget)
+
+    if memory_budget:
+      print(memory_budget.report())
+
 if __name__ == "__main__":
-  test_file_path = "../wmsetus.obj"
-  os.system('cls' if os.name == 'nt' else 'clear')
-  process_file(test_file_path)
\ No newline at end of file
+  from cli import main
+  sys.exit(main())
\ No newline at end of file
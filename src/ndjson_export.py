@@ -0,0 +1,64 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, TextIO
+from wmset import SCRIPT_SECTIONS, WmsetFile
+import json
+
+Record = Dict[str, Any]
+
+RECORD_KINDS = ("names", "dialog", "drawpoints", "scripts")
+
+## Records are yielded one at a time and never collected, a section is only
+## parsed when its first record is asked for.
+
+def iter_location_names(wmset: WmsetFile) -> Iterator[Record]:
+  for i, name in enumerate(wmset.location_names):
+    yield {"type": "location_name", "section": 31, "index": i, "text": name}
+
+def iter_dialog(wmset: WmsetFile) -> Iterator[Record]:
+  for i, text in enumerate(wmset.dialog):
+    yield {"type": "dialog", "section": 13, "index": i, "text": text}
+
+def iter_draw_points(wmset: WmsetFile) -> Iterator[Record]:
+  for i, point in enumerate(wmset.draw_points):
+    yield {"type": "draw_point", "section": 34, "index": i, "x": point.x, "y": point.y, "magic_id": point.magicId}
+
+def iter_script_instructions(wmset: WmsetFile, sections: Sequence[int] = SCRIPT_SECTIONS) -> Iterator[Record]:
+  for section in sections:
+    for e, entity in enumerate(wmset.scripts(section).entities):
+      for s, script in enumerate(entity.scripts):
+        for i, opcode in enumerate(script.opcodes):
+          yield {
+            "type": "instruction",
+            "section": section,
+            "entity": e,
+            "script": s,
+            "index": i,
+            "opcode": opcode.code,
+            "param1": opcode.param1,
+            "param2": opcode.param2,
+          }
+
+def iter_records(wmset: WmsetFile, kinds: Optional[Sequence[str]] = None) -> Iterator[Record]:
+  generators = {
+    "names": iter_location_names,
+    "dialog": iter_dialog,
+    "drawpoints": iter_draw_points,
+    "scripts": iter_script_instructions,
+  }
+  for kind in kinds or RECORD_KINDS:
+    if kind not in generators:
+      raise ValueError(f"Unknown record kind {kind}, expected one of {RECORD_KINDS}")
+    yield from generators[kind](wmset)
+
+def write_ndjson(records: Iterable[Record], fp: TextIO, source: Optional[str] = None) -> int:
+  """
+  Write one JSON object per line and return how many were written.
+  source, if given, is added to every record so outputs from several files can be merged.
+  """
+  count = 0
+  for record in records:
+    if source is not None:
+      record["source"] = source
+    fp.write(json.dumps(record, ensure_ascii=False))
+    fp.write("\n")
+    count += 1
+  return count
@@ -0,0 +1,147 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+from utils.string_pool import StringPool
+from wmset import WmsetFile, open_wmset
+import json
+import re
+import sys
+
+INDEX_VERSION = 1
+
+## Control codes from CharTable.fromFF8 ({Squall}, {Yellow}, {x0312}, ...) are single tokens
+TOKEN_PATTERN = re.compile(r"\{[^{}\s]*\}|\w+")
+
+## Same tokens as TOKEN_PATTERN, each optionally ending in * for a prefix match, plus unclosed "{x03*" prefixes
+QUERY_PATTERN = re.compile(r"\{[^{}\s*]*\}\*?|\{[^{}\s*]*\*|\w+\*?")
+
+def tokenize(text: str) -> List[str]:
+  return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+def query_terms(query: str) -> List[str]:
+  """
+  Split a query the way documents are tokenized, so text copied from the data
+  ("{Red}Warning", "Hello,") finds itself, keeping a trailing * on prefix terms.
+  """
+  return [token.lower() for token in QUERY_PATTERN.findall(query)]
+
+
+@dataclass
+class Document:
+  source: str
+  kind: str  # "dialog" or "location_name"
+  index: int
+  text: str
+
+
+@dataclass(init=False)
+class SearchIndex:
+  """
+  Inverted index over decoded dialog and location names of one or more wmset files.
+  Terms are lowercased; a query term ending in * matches every term with that prefix,
+  so "{x03*" finds all unknown character name codes.
+  """
+  documents: List[Document]
+  postings: Dict[str, List[int]]
+
+  def __init__(self):
+    self.documents = []
+    self.postings = {}
+    self._terms: List[str] = []
+
+  def add(self, source: str, kind: str, index: int, text: str) -> None:
+    doc_id = len(self.documents)
+    self.documents.append(Document(source, kind, index, text))
+    for term in set(tokenize(text)):
+      self.postings.setdefault(term, []).append(doc_id)
+
+  def add_wmset(self, wmset: WmsetFile) -> None:
+    for i, text in enumerate(wmset.dialog):
+      self.add(wmset.path, "dialog", i, text)
+    for i, name in enumerate(wmset.location_names):
+      self.add(wmset.path, "location_name", i, name)
+
+  @property
+  def terms(self) -> List[str]:
+    ## Terms are never removed, so a count change means new ones were added
+    if len(self._terms) != len(self.postings):
+      self._terms = sorted(self.postings)
+    return self._terms
+
+  def lookup(self, term: str) -> Set[int]:
+    term = term.lower()
+    if not term.endswith("*"):
+      return set(self.postings.get(term, ()))
+
+    prefix = term[:-1]
+    terms = self.terms
+    matches: Set[int] = set()
+    for i in range(bisect_left(terms, prefix), len(terms)):
+      if not terms[i].startswith(prefix):
+        break
+      matches.update(self.postings[terms[i]])
+    return matches
+
+  def search(self, query: str) -> List[Document]:
+    """
+    Documents containing every term in the query.
+    """
+    words = query_terms(query)
+    if not words:
+      return []
+    result = None
+    ## Smallest posting lists first keeps the intersections cheap
+    for doc_ids in sorted((self.lookup(word) for word in words), key=len):
+      result = doc_ids if result is None else result & doc_ids
+      if not result:
+        return []
+    return [self.documents[doc_id] for doc_id in sorted(result)]
+
+  def save(self, path: str) -> None:
+    data = {
+      "version": INDEX_VERSION,
+      "documents": [[d.source, d.kind, d.index, d.text] for d in self.documents],
+      "postings": self.postings,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+      json.dump(data, f, ensure_ascii=False)
+
+  @staticmethod
+  def load(path: str) -> "SearchIndex":
+    with open(path, encoding="utf-8") as f:
+      data = json.load(f)
+    if data.get("version") != INDEX_VERSION:
+      raise ValueError(f"{path} is index version {data.get('version')}, expected {INDEX_VERSION}")
+
+    index = SearchIndex()
+    index.documents = [Document(*document) for document in data["documents"]]
+    index.postings = data["postings"]
+    return index
+
+
+def build_index(paths: Iterable[str], string_pool: Optional[StringPool] = None) -> SearchIndex:
+  ## Language and mod variants repeat most of their strings, decode each one once
+  string_pool = string_pool if string_pool is not None else StringPool()
+  index = SearchIndex()
+  for path in paths:
+    index.add_wmset(open_wmset(path, string_pool))
+  return index
+
+
+if __name__ == "__main__":
+  usage = "usage: search_index.py build <index.json> <wmset>... | query <index.json> <terms>..."
+  if len(sys.argv) < 4 or sys.argv[1] not in ("build", "query"):
+    print(usage, file=sys.stderr)
+    sys.exit(2)
+
+  if sys.argv[1] == "build":
+    string_pool = StringPool()
+    index = build_index(sys.argv[3:], string_pool)
+    index.save(sys.argv[2])
+    print(f"Indexed {len(index.documents)} strings, {len(index.postings)} terms")
+    print(string_pool.report())
+  else:
+    index = SearchIndex.load(sys.argv[2])
+    for document in index.search(" ".join(sys.argv[3:])):
+      text = document.text.replace("\n", "\\n")
+      print(f"{document.source}\t{document.kind}\t{document.index}\t{text}")
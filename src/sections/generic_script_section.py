@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import List
-from utils.binary_reader import BinaryReader
+from typing import ClassVar, Dict, List, Optional
+from utils.cursor import Cursor
+from utils.record_layout import Field, RecordLayout
 from io import BytesIO
 from .opcodes import OPCODES
 
@@ -10,6 +11,9 @@ class Opcode:
   param1: int = 0
   param2: int = 0
 
+## Opcode followed by its two parameters, the script ends at opcode 0
+INSTRUCTION = RecordLayout(Field("opcode", "h"), Field("param1", "B"), Field("param2", "B"))
+
 @dataclass
 class Script:
   opcodes: List[Opcode]
@@ -23,40 +27,55 @@ class GenericScriptSection:
   offsets: List[int]
   entities: List[ScriptEntity]
 
-  def __init__(self, stream: BytesIO):
-    self.offsets = self.parse_script_data_offsets(stream)
-    self.entities = self.parse_scripts(stream)
+  SECTION_INDEX: ClassVar[Optional[int]] = None
+
+  def __init__(self, stream: BytesIO, hardened: bool = False):
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      self.offsets = self.parse_script_data_offsets(cursor, hardened)
+      self.entities = self.parse_scripts(cursor, hardened)
 
   
-  def parse_script_data_offsets(self, stream: BytesIO) -> List[int]:
-    offsets: List[int] = []
+  def parse_script_data_offsets(self, cursor: Cursor, hardened: bool = False) -> List[int]:
+    return cursor.read_offset_table(bounded=hardened)
+
+  def parse_scripts(self, cursor: Cursor, hardened: bool = False) -> List[ScriptEntity]:
+    """
+    hardened keeps the work linear in the section size: a script may not run into the
+    next one, and entities sharing an offset share one parsed ScriptEntity.
+    """
+    if not hardened:
+      entities: List[ScriptEntity] = []
+      for offset in self.offsets:
+        cursor.seek(offset)
+        entities.append(self.parse_entity(cursor))
+      return entities
+
+    ends = sorted(set(self.offsets)) + [len(cursor)]
+    parsed: Dict[int, ScriptEntity] = {}
+    for start, end in zip(ends, ends[1:]):
+      parsed[start] = self.parse_entity(cursor.slice(start, end))
+    return [parsed[offset] for offset in self.offsets]
+
+  def parse_entity(self, cursor: Cursor) -> ScriptEntity:
+    script = ScriptEntity(scripts=[])
+    current_script = Script(opcodes=[])
     while True:
-      offset = BinaryReader.read_uint32(stream)
-      if offset == 0:
-        break
-      offsets.append(offset)
-
-    return offsets
-
-  def parse_scripts(self, stream: BytesIO) -> List[ScriptEntity]:
-    entities: List[ScriptEntity] = []
-    for offset in self.offsets:
-      stream.seek(offset)
-      script = ScriptEntity(scripts=[])
-      current_script = Script(opcodes=[])
-      while True:
-        opcode = BinaryReader.read_int16(stream)
-        if opcode == 0:
+      if cursor.remaining < INSTRUCTION.size:
+        ## The terminating opcode has no parameters, so it can be the last 2 bytes of the section
+        if cursor.read_int16() == 0:
           break
-        param1 = BinaryReader.read_uint8(stream)
-        param2 = BinaryReader.read_uint8(stream)
-        if opcode == -255:
-          if len(current_script.opcodes) > 0:
-            script.scripts.append(current_script)
-          current_script = Script(opcodes=[])
-
-        current_script.opcodes.append(Opcode(code=OPCODES.get(opcode, {"opcode": "UNRECOGNISED"})["opcode"], param1=param1, param2=param2))
-
-      entities.append(script)
-    
-    return entities
\ No newline at end of file
+        cursor.skip(INSTRUCTION.size - 2)
+      opcode, param1, param2 = cursor.read_record(INSTRUCTION)
+      if opcode == 0:
+        break
+      if opcode == -255:
+        if len(current_script.opcodes) > 0:
+          script.scripts.append(current_script)
+        current_script = Script(opcodes=[])
+
+      current_script.opcodes.append(Opcode(code=OPCODES.get(opcode, {"opcode": "UNRECOGNISED"})["opcode"], param1=param1, param2=param2))
+
+    ## The terminator ends the last script as well as the entity
+    if len(current_script.opcodes) > 0:
+      script.scripts.append(current_script)
+    return script
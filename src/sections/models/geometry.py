@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Sequence, Tuple
+import numpy as np
+from sections.models.parse import Model
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+
+
+@dataclass(init=False)
+class MeshGeometry:
+    """
+    Derived geometry for one or many models, computed in a single NumPy pass.
+    Positions from every model are packed into one array; vertex_offsets and
+    face_offsets mark where each model starts. Everything except `positions`
+    is in export space: divided by scale, with Y flipped, same as the OBJ export.
+    """
+    positions: np.ndarray       # (N, 3) int16, raw model units
+    faces: np.ndarray           # (F, 3) int32, indices into positions
+    vertex_offsets: np.ndarray  # (M + 1,) int64
+    face_offsets: np.ndarray    # (M + 1,) int64
+    scale: float
+
+    def __init__(self, models: Sequence[Model], scale: float = 100.0):
+        self.scale = scale
+        vertex_counts = [len(model.vertices) for model in models]
+        face_counts = [len(model.triangles) + 2 * len(model.quads) for model in models]
+        self.vertex_offsets = np.concatenate(([0], np.cumsum(vertex_counts, dtype=np.int64)))
+        self.face_offsets = np.concatenate(([0], np.cumsum(face_counts, dtype=np.int64)))
+
+        vertex_bytes = b"".join(vertex.data for model in models for vertex in model.vertices)
+        self.positions = np.frombuffer(vertex_bytes, dtype="<i2").reshape(-1, 4)[:, :3]
+
+        faces = []
+        for model, base in zip(models, self.vertex_offsets[:-1]):
+            faces.append(self._model_faces(model) + base)
+        self.faces = np.concatenate(faces) if faces else np.zeros((0, 3), dtype=np.int32)
+
+    @staticmethod
+    def _model_faces(model: Model) -> np.ndarray:
+        tris = np.frombuffer(b"".join(tri.data for tri in model.triangles), dtype=np.uint8).reshape(-1, 12)[:, :3]
+        quads = np.frombuffer(b"".join(quad.data for quad in model.quads), dtype=np.uint8).reshape(-1, 16)[:, :4]
+        # PS1 quads are laid out 0 1 / 2 3, split along the same diagonal as IndexedMesh
+        quad_tris = quads[:, [0, 1, 3, 0, 3, 2]].reshape(-1, 3)
+        return np.concatenate((tris, quad_tris)).astype(np.int32)
+
+    @property
+    def model_count(self) -> int:
+        return len(self.vertex_offsets) - 1
+
+    @cached_property
+    def transformed(self) -> np.ndarray:
+        """(N, 3) float32 positions in export space."""
+        return self.positions.astype(np.float32) * np.array([1.0, -1.0, 1.0], dtype=np.float32) / np.float32(self.scale)
+
+    @cached_property
+    def bounds(self) -> np.ndarray:
+        """(M, 2, 3) float32 axis-aligned min/max per model. Models without vertices are NaN."""
+        result = np.full((self.model_count, 2, 3), np.nan, dtype=np.float32)
+        starts = self.vertex_offsets[:-1]
+        non_empty = np.flatnonzero(np.diff(self.vertex_offsets) > 0)
+        if len(non_empty):
+            result[non_empty, 0] = np.minimum.reduceat(self.transformed, starts[non_empty])
+            result[non_empty, 1] = np.maximum.reduceat(self.transformed, starts[non_empty])
+        return result
+
+    @cached_property
+    def total_bounds(self) -> np.ndarray:
+        """(2, 3) float32 min/max over every model."""
+        if not len(self.transformed):
+            return np.full((2, 3), np.nan, dtype=np.float32)
+        return np.stack((self.transformed.min(axis=0), self.transformed.max(axis=0)))
+
+    @cached_property
+    def _face_cross(self) -> np.ndarray:
+        p = self.transformed
+        a, b, c = p[self.faces[:, 0]], p[self.faces[:, 1]], p[self.faces[:, 2]]
+        return np.cross(b - a, c - a)
+
+    @cached_property
+    def face_normals(self) -> np.ndarray:
+        """(F, 3) float32 unit normals. Degenerate faces are zero."""
+        return _normalize(self._face_cross)
+
+    @cached_property
+    def vertex_normals(self) -> np.ndarray:
+        """(N, 3) float32 area weighted average of the adjacent face normals."""
+        normals = np.zeros_like(self.transformed)
+        for corner in range(3):
+            np.add.at(normals, self.faces[:, corner], self._face_cross)
+        return _normalize(normals)
+
+    def vertex_range(self, model_index: int) -> Tuple[int, int]:
+        return int(self.vertex_offsets[model_index]), int(self.vertex_offsets[model_index + 1])
+
+    def face_range(self, model_index: int) -> Tuple[int, int]:
+        return int(self.face_offsets[model_index]), int(self.face_offsets[model_index + 1])
@@ -0,0 +1,104 @@
+from array import array
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+import json
+import struct
+import sys
+from sections.models.mesh import IndexedMesh
+from sections.models.parse import Model
+
+if TYPE_CHECKING:
+    from sections.textures.tim import TIM
+
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+NEAREST = 9728
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad(data: bytes, fill: bytes) -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def build_glb(model: Model, tim: Optional["TIM"] = None, name: str = "model") -> bytes:
+    """
+    Encode a Model as a single binary glTF 2.0 (.glb), with its TIM embedded as a PNG.
+    Positions match the OBJ export (divided by 100, Y flipped), UVs are normalized to the
+    texture size. Materials are double sided and alpha masked, as PS1 polygons are not
+    culled and STP texels are see-through.
+    """
+    mesh = IndexedMesh.from_model(model)
+    positions = array("f", (component for position in mesh.scaled_positions() for component in position))
+    chunks: List[bytes] = []
+    buffer_views: List[Dict[str, Any]] = []
+
+    def add_view(data: bytes, target: Optional[int] = None) -> int:
+        view: Dict[str, Any] = {"buffer": 0, "byteOffset": sum(len(chunk) for chunk in chunks), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        buffer_views.append(view)
+        chunks.append(_pad(data, b"\0"))
+        return len(buffer_views) - 1
+
+    accessors: List[Dict[str, Any]] = [{
+        "bufferView": add_view(_little_endian(positions), ARRAY_BUFFER),
+        "componentType": FLOAT,
+        "count": mesh.vertex_count,
+        "type": "VEC3",
+        "min": [min(positions[axis::3], default=0.0) for axis in range(3)],
+        "max": [max(positions[axis::3], default=0.0) for axis in range(3)],
+    }, {
+        "bufferView": add_view(_little_endian(mesh.indices), ELEMENT_ARRAY_BUFFER),
+        "componentType": UNSIGNED_SHORT,
+        "count": len(mesh.indices),
+        "type": "SCALAR",
+    }]
+    attributes = {"POSITION": 0}
+    primitive: Dict[str, Any] = {"attributes": attributes, "indices": 1}
+    document: Dict[str, Any] = {
+        "asset": {"version": "2.0", "generator": "wmset parser"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": name}],
+        "meshes": [{"name": name, "primitives": [primitive]}],
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+    }
+
+    if tim is not None:
+        width, height = tim.header.img_w, tim.header.img_h
+        uvs = array("f", (value / (width if i % 2 == 0 else height) for i, value in enumerate(mesh.uvs)))
+        accessors.append({
+            "bufferView": add_view(_little_endian(uvs), ARRAY_BUFFER),
+            "componentType": FLOAT,
+            "count": mesh.vertex_count,
+            "type": "VEC2",
+        })
+        attributes["TEXCOORD_0"] = len(accessors) - 1
+        primitive["material"] = 0
+        document["images"] = [{"bufferView": add_view(tim.encode_png()), "mimeType": "image/png"}]
+        document["samplers"] = [{"magFilter": NEAREST, "minFilter": NEAREST}]
+        document["textures"] = [{"sampler": 0, "source": 0}]
+        document["materials"] = [{
+            "name": tim.name,
+            "pbrMetallicRoughness": {"baseColorTexture": {"index": 0}, "metallicFactor": 0.0, "roughnessFactor": 1.0},
+            "alphaMode": "MASK",
+            "doubleSided": True,
+        }]
+
+    binary = b"".join(chunks)
+    document["buffers"] = [{"byteLength": len(binary)}]
+    json_chunk = _pad(json.dumps(document, separators=(",", ":")).encode(), b" ")
+    length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return b"".join((
+        struct.pack("<4sII", b"glTF", 2, length),
+        struct.pack("<I4s", len(json_chunk), b"JSON"), json_chunk,
+        struct.pack("<I4s", len(binary), b"BIN\0"), binary,
+    ))
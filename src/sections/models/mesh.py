@@ -0,0 +1,70 @@
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from sections.models.parse import Model
+
+
+@dataclass
+class IndexedMesh:
+    """
+    Triangulated, welded version of a Model.
+    Corners sharing position, UV and CLUT collapse into a single vertex so the
+    buffers can be handed straight to an exporter or a GPU.
+    """
+    positions: array  # int16 x, y, z per vertex, in model units
+    uvs: array        # uint8 u, v per vertex, in texels
+    cluts: array      # uint16 clut id per vertex
+    indices: array    # uint16, three per triangle
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.cluts)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices) // 3
+
+    def scaled_positions(self, scale: float = 100.0) -> List[Tuple[float, float, float]]:
+        """Positions as exported: divided by scale, with Y flipped."""
+        p = self.positions
+        return [(p[i] / scale, -p[i + 1] / scale, p[i + 2] / scale) for i in range(0, len(p), 3)]
+
+    def normalized_uvs(self, width: int, height: int) -> List[Tuple[float, float]]:
+        """UVs in 0..1 with V flipped, as OBJ/glTF expect."""
+        t = self.uvs
+        return [(t[i] / width, 1.0 - (t[i + 1] / height)) for i in range(0, len(t), 2)]
+
+    @staticmethod
+    def from_model(model: Model) -> "IndexedMesh":
+        positions = array("h")
+        uvs = array("B")
+        cluts = array("H")
+        indices = array("H")
+        welded: Dict[Tuple[int, int, int, int, int, int], int] = {}
+        vertices = model.vertices
+
+        def corner(vertex_index: int, texcoord: List[int], clut_id: int) -> int:
+            vertex = vertices[vertex_index]
+            key = (vertex.x, vertex.y, vertex.z, texcoord[0], texcoord[1], clut_id)
+            index = welded.get(key)
+            if index is None:
+                index = len(welded)
+                if index > 0xFFFF:
+                    raise ValueError(f"{model} has more than 65536 unique corners, too many for uint16 indices")
+                welded[key] = index
+                positions.extend(key[:3])
+                uvs.extend(key[3:5])
+                cluts.append(clut_id)
+            return index
+
+        for tri in model.triangles:
+            texcoords = [tri.texcoords1, tri.texcoords2, tri.texcoords3]
+            indices.extend(corner(tri.vertex_indices[i], texcoords[i], tri.clut_id) for i in range(3))
+
+        for quad in model.quads:
+            texcoords = [quad.texcoords1, quad.texcoords2, quad.texcoords3, quad.texcoords4]
+            c = [corner(quad.vertex_indices[i], texcoords[i], quad.clut_id) for i in range(4)]
+            # PS1 quads are laid out 0 1 / 2 3, so the outline is 0 1 3 2
+            indices.extend((c[0], c[1], c[3], c[0], c[3], c[2]))
+
+        return IndexedMesh(positions=positions, uvs=uvs, cluts=cluts, indices=indices)
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
-from typing import List
-from io import BytesIO
-import struct
-from utils.binary_reader import BinaryReader
+from functools import cached_property
+from typing import ClassVar, List, Optional, Tuple, Type, TypeVar, TYPE_CHECKING
+from utils.cursor import Cursor
+from utils.record_layout import Field, RecordLayout
+
+if TYPE_CHECKING:
+    from sections.models.geometry import MeshGeometry
 
 
 @dataclass(init=False)
@@ -14,16 +17,20 @@ class Triangle:
     texcoords2: List[int]
     texcoords3: List[int]
     clut_id: int
-    
-    def __init__(self, data: bytes):
+
+    LAYOUT: ClassVar[RecordLayout] = RecordLayout(
+        Field("vertex_indices", "B", 3),
+        Field("semitransp", "B"),
+        Field("texcoords1", "B", 2),
+        Field("texcoords2", "B", 2),
+        Field("texcoords3", "B", 2),
+        Field("clut_id", "H"),
+    )
+
+    def __init__(self, data: bytes, values: Optional[Tuple] = None):
         self.data = data
-        stream = BytesIO(self.data)
-        self.vertex_indices = [BinaryReader.read_uint8(stream) for _ in range(3)]
-        self.semitransp = BinaryReader.read_uint8(stream)
-        self.texcoords1 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.texcoords2 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.texcoords3 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.clut_id = BinaryReader.read_uint16(stream)
+        (self.vertex_indices, self.semitransp, self.texcoords1, self.texcoords2,
+         self.texcoords3, self.clut_id) = values if values is not None else self.LAYOUT.unpack(data)
     
     def __repr__(self):
         return (f"Triangle(vertices={self.vertex_indices}, "
@@ -42,18 +49,22 @@ class Quad:
     clut_id: int
     semitransp: int
     unknown: int
-    
-    def __init__(self, data: bytes):
+
+    LAYOUT: ClassVar[RecordLayout] = RecordLayout(
+        Field("vertex_indices", "B", 4),
+        Field("texcoords1", "B", 2),
+        Field("texcoords2", "B", 2),
+        Field("texcoords3", "B", 2),
+        Field("texcoords4", "B", 2),
+        Field("clut_id", "H"),
+        Field("semitransp", "B"),
+        Field("unknown", "B"),
+    )
+
+    def __init__(self, data: bytes, values: Optional[Tuple] = None):
         self.data = data
-        stream = BytesIO(self.data)
-        self.vertex_indices = [BinaryReader.read_uint8(stream) for _ in range(4)]
-        self.texcoords1 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.texcoords2 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.texcoords3 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.texcoords4 = [BinaryReader.read_uint8(stream) for _ in range(2)]
-        self.clut_id = BinaryReader.read_uint16(stream)
-        self.semitransp = BinaryReader.read_uint8(stream)
-        self.unknown = BinaryReader.read_uint8(stream)
+        (self.vertex_indices, self.texcoords1, self.texcoords2, self.texcoords3,
+         self.texcoords4, self.clut_id, self.semitransp, self.unknown) = values if values is not None else self.LAYOUT.unpack(data)
     
     def __repr__(self):
         return (f"Quad(vertices={self.vertex_indices}, "
@@ -68,19 +79,34 @@ class Vertex:
     y: int
     z: int
     unknown: int
-    
-    def __init__(self, data: bytes):
+
+    LAYOUT: ClassVar[RecordLayout] = RecordLayout(
+        Field("x", "h"),
+        Field("y", "h"),
+        Field("z", "h"),
+        Field("unknown", "H"),
+    )
+
+    def __init__(self, data: bytes, values: Optional[Tuple] = None):
         self.data = data
-        stream = BytesIO(self.data)
-        self.x = struct.unpack("<h", stream.read(2))[0]
-        self.y = struct.unpack("<h", stream.read(2))[0]
-        self.z = struct.unpack("<h", stream.read(2))[0]
-        self.unknown = BinaryReader.read_uint16(stream)
+        self.x, self.y, self.z, self.unknown = values if values is not None else self.LAYOUT.unpack(data)
     
     def __repr__(self):
         return f"Vertex(x={self.x}, y={self.y}, z={self.z})"
 
 
+Primitive = TypeVar("Primitive", Triangle, Quad, Vertex)
+
+def read_primitives(cursor: Cursor, primitive: Type[Primitive], count: int) -> List[Primitive]:
+    """
+    Decode count consecutive records in one call, each keeping its own raw bytes.
+    """
+    size = primitive.LAYOUT.size
+    data = cursor.read_bytes(size * count)
+    values = primitive.LAYOUT.unpack_array(data, count)
+    return [primitive(data[i * size:(i + 1) * size], record) for i, record in enumerate(values)]
+
+
 @dataclass(init=False)
 class Model:
     triangle_count: int
@@ -90,28 +116,34 @@ class Model:
     triangles: List[Triangle]
     quads: List[Quad]
     vertices: List[Vertex]
+
+    HEADER: ClassVar[RecordLayout] = RecordLayout(
+        Field("triangle_count", "H"),
+        Field("quad_count", "H"),
+        Field("texture_page", "H"),
+        Field("vertex_count", "H"),
+    )
     
-    def __init__(self, stream: BytesIO):
-        self.triangle_count = BinaryReader.read_uint16(stream)
-        self.quad_count = BinaryReader.read_uint16(stream)
-        self.texture_page = BinaryReader.read_uint16(stream)
-        self.vertex_count = BinaryReader.read_uint16(stream)
-
-        self.triangles = []
-        for _ in range(self.triangle_count):
-            triangle_data = BinaryReader.read_bytes(stream, 12)
-            self.triangles.append(Triangle(triangle_data))
-        
-        self.quads = []
-        for _ in range(self.quad_count):
-            quad_data = BinaryReader.read_bytes(stream, 16)
-            self.quads.append(Quad(quad_data))
-        
-        self.vertices = []
-        for _ in range(self.vertex_count):
-            vertex_data = BinaryReader.read_bytes(stream, 8)
-            self.vertices.append(Vertex(vertex_data))
+    def __init__(self, cursor: Cursor, hardened: bool = False):
+        (self.triangle_count, self.quad_count,
+         self.texture_page, self.vertex_count) = cursor.read_record(self.HEADER)
+
+        self.triangles = read_primitives(cursor, Triangle, self.triangle_count)
+        self.quads = read_primitives(cursor, Quad, self.quad_count)
+        self.vertices = read_primitives(cursor, Vertex, self.vertex_count)
+
+        if hardened:
+            ## Exporters index vertices directly, catch bad indices here rather than halfway through an export
+            highest = max((max(primitive.vertex_indices) for primitive in self.triangles + self.quads), default=-1)
+            if highest >= self.vertex_count:
+                raise ValueError(f"{cursor.context}: model at offset {cursor.base:#x} uses vertex {highest} of {self.vertex_count}")
     
+    @cached_property
+    def geometry(self) -> "MeshGeometry":
+        """Bounds, normals and export-space positions, computed once with NumPy."""
+        from sections.models.geometry import MeshGeometry
+        return MeshGeometry([self])
+
     def __repr__(self):
         return (f"Model(triangles={self.triangle_count}, "
                 f"quads={self.quad_count}, "
@@ -0,0 +1,171 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+from sections.models.mesh import IndexedMesh
+from sections.models.parse import Model
+from sections.textures.cache import texture_cache
+from sections.textures.tim import TIM
+
+# Three quarter view: turn 45 degrees around Y, then tilt 30 degrees down
+YAW = np.radians(45.0)
+PITCH = np.radians(30.0)
+LIGHT = np.array([0.3, 0.8, 0.5]) / np.linalg.norm([0.3, 0.8, 0.5])
+# Candidate (triangle, pixel) pairs handled per pass, bounds peak memory
+MAX_CANDIDATES = 1 << 21
+
+
+def _view_matrix() -> np.ndarray:
+    cy, sy = np.cos(YAW), np.sin(YAW)
+    cp, sp = np.cos(PITCH), np.sin(PITCH)
+    yaw = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    pitch = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    return pitch @ yaw
+
+
+def _pack(models: Sequence[Model], textures: Sequence[TIM]) -> Tuple[np.ndarray, ...]:
+    """
+    Flatten every model into one triangle list: corner positions, corner UVs,
+    owning model and the start of its texture in one packed RGBA texel array.
+    """
+    positions: List[np.ndarray] = []
+    uvs: List[np.ndarray] = []
+    owners: List[np.ndarray] = []
+    texels: List[np.ndarray] = []
+    texture_info = np.zeros((len(models), 3), dtype=np.int64)  # texel offset, width, height
+    texel_offset = 0
+
+    for m, (model, tim) in enumerate(zip(models, textures)):
+        mesh = IndexedMesh.from_model(model)
+        indices = np.frombuffer(mesh.indices, dtype=np.uint16).astype(np.int64)
+        vertex_positions = np.frombuffer(mesh.positions, dtype=np.int16).reshape(-1, 3)
+        vertex_uvs = np.frombuffer(mesh.uvs, dtype=np.uint8).reshape(-1, 2)
+        positions.append(vertex_positions[indices].reshape(-1, 3, 3))
+        uvs.append(vertex_uvs[indices].reshape(-1, 3, 2))
+        owners.append(np.full(len(indices) // 3, m, dtype=np.int64))
+
+        rgba = texture_cache.get(tim)
+        texture_info[m] = (texel_offset, rgba.shape[1], rgba.shape[0])
+        texels.append(rgba.reshape(-1, 4))
+        texel_offset += rgba.shape[0] * rgba.shape[1]
+
+    if not positions:
+        empty = np.zeros((0, 3, 3))
+        return empty, np.zeros((0, 3, 2)), np.zeros(0, dtype=np.int64), np.zeros((1, 4), dtype=np.uint8), texture_info
+
+    # Export space, same /100 and Y flip as the OBJ export, then into view space
+    corners = np.concatenate(positions).astype(np.float64) * np.array([1.0, -1.0, 1.0]) / 100.0
+    corners = corners @ _view_matrix().T
+    return corners, np.concatenate(uvs).astype(np.float64), np.concatenate(owners), np.concatenate(texels), texture_info
+
+
+def _fit_to_screen(corners: np.ndarray, owners: np.ndarray, model_count: int, size: int, margin: int) -> np.ndarray:
+    """Scale and center each model's projected triangles to fill its own size x size image."""
+    xy = corners[..., :2]
+    lo = np.full((model_count, 2), np.inf)
+    hi = np.full((model_count, 2), -np.inf)
+    np.minimum.at(lo, owners, xy.min(axis=1))
+    np.maximum.at(hi, owners, xy.max(axis=1))
+    # Models without triangles stay at +-inf and are never looked up
+    with np.errstate(invalid="ignore"):
+        extent = np.maximum((hi - lo).max(axis=1), 1e-9)
+    scale = (size - 2 * margin) / extent
+    center = (lo + hi) / 2
+
+    screen = np.empty_like(corners)
+    per_corner_scale = scale[owners][:, None]
+    screen[..., 0] = (xy[..., 0] - center[owners][:, None, 0]) * per_corner_scale + size / 2
+    # Image rows go down, view Y goes up
+    screen[..., 1] = size / 2 - (xy[..., 1] - center[owners][:, None, 1]) * per_corner_scale
+    screen[..., 2] = -corners[..., 2]  # smaller is closer
+    return screen
+
+
+def render_thumbnails(models: Sequence[Model], textures: Sequence[TIM], size: int = 128, margin: int = 4) -> np.ndarray:
+    """
+    Render textured thumbnails of many models in one batched, CPU only pass.
+    models[i] is drawn with textures[i]. Returns (len(models), size, size, 4) uint8 RGBA.
+    Texture lookup is affine and nearest neighbour, as on the PS1; transparent texels are skipped.
+    """
+    model_count = len(models)
+    color = np.zeros((model_count * size * size, 4), dtype=np.uint8)
+    depth = np.full(model_count * size * size, np.inf)
+
+    corners, uvs, owners, texels, texture_info = _pack(models, textures)
+    if not len(corners):
+        return color.reshape(model_count, size, size, 4)
+
+    screen = _fit_to_screen(corners, owners, model_count, size, margin)
+
+    # Flat shading from the view space face normal, both sides lit since there is no culling
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    shade = 0.55 + 0.45 * np.abs(normals @ LIGHT) / np.where(lengths > 0, lengths, 1.0)
+
+    a, b, c = screen[:, 0, :2], screen[:, 1, :2], screen[:, 2, :2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    x0 = np.clip(np.floor(screen[..., 0].min(axis=1)), 0, size - 1).astype(np.int64)
+    x1 = np.clip(np.ceil(screen[..., 0].max(axis=1)), 0, size - 1).astype(np.int64)
+    y0 = np.clip(np.floor(screen[..., 1].min(axis=1)), 0, size - 1).astype(np.int64)
+    y1 = np.clip(np.ceil(screen[..., 1].max(axis=1)), 0, size - 1).astype(np.int64)
+    box_w = x1 - x0 + 1
+    counts = np.where(np.abs(area) > 1e-12, box_w * (y1 - y0 + 1), 0)
+
+    # Split the triangles into passes of at most MAX_CANDIDATES covered-box pixels
+    ends = np.cumsum(counts)
+    first = 0
+    while first < len(counts):
+        last = max(int(np.searchsorted(ends, (ends[first - 1] if first else 0) + MAX_CANDIDATES, side="right")), first + 1)
+        _rasterize(np.arange(first, last), counts, x0, y0, box_w, screen, area, uvs, owners, shade, texels, texture_info, size, color, depth)
+        first = last
+
+    return color.reshape(model_count, size, size, 4)
+
+
+def _rasterize(tris: np.ndarray, counts: np.ndarray, x0: np.ndarray, y0: np.ndarray, box_w: np.ndarray,
+               screen: np.ndarray, area: np.ndarray, uvs: np.ndarray, owners: np.ndarray, shade: np.ndarray,
+               texels: np.ndarray, texture_info: np.ndarray, size: int, color: np.ndarray, depth: np.ndarray) -> None:
+    # One row per (triangle, pixel in its bounding box)
+    tri = np.repeat(tris, counts[tris])
+    if not len(tri):
+        return
+    starts = np.cumsum(counts[tris]) - counts[tris]
+    local = np.arange(len(tri)) - np.repeat(starts, counts[tris])
+    px = x0[tri] + local % box_w[tri]
+    py = y0[tri] + local // box_w[tri]
+
+    # Barycentrics at pixel centers
+    sx, sy = px + 0.5, py + 0.5
+    a, b, c = screen[tri, 0], screen[tri, 1], screen[tri, 2]
+    w0 = ((b[:, 0] - sx) * (c[:, 1] - sy) - (b[:, 1] - sy) * (c[:, 0] - sx)) / area[tri]
+    w1 = ((c[:, 0] - sx) * (a[:, 1] - sy) - (c[:, 1] - sy) * (a[:, 0] - sx)) / area[tri]
+    w2 = 1.0 - w0 - w1
+    inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+
+    tri, px, py, w0, w1, w2 = tri[inside], px[inside], py[inside], w0[inside], w1[inside], w2[inside]
+    z = w0 * screen[tri, 0, 2] + w1 * screen[tri, 1, 2] + w2 * screen[tri, 2, 2]
+
+    # Affine texture lookup, nearest texel
+    owner = owners[tri]
+    offset, tex_w, tex_h = texture_info[owner, 0], texture_info[owner, 1], texture_info[owner, 2]
+    u = w0 * uvs[tri, 0, 0] + w1 * uvs[tri, 1, 0] + w2 * uvs[tri, 2, 0]
+    v = w0 * uvs[tri, 0, 1] + w1 * uvs[tri, 1, 1] + w2 * uvs[tri, 2, 1]
+    tu = np.clip(u.astype(np.int64), 0, tex_w - 1)
+    tv = np.clip(v.astype(np.int64), 0, tex_h - 1)
+    sample = texels[offset + tv * tex_w + tu]
+
+    opaque = sample[:, 3] > 0
+    pixel = (owner * size + py) * size + px
+    pixel, z, sample, tri = pixel[opaque], z[opaque], sample[opaque], tri[opaque]
+
+    # Nearest fragment per pixel in this pass, then test against what earlier passes drew
+    order = np.lexsort((z, pixel))
+    pixel, z, sample, tri = pixel[order], z[order], sample[order], tri[order]
+    nearest = np.ones(len(pixel), dtype=bool)
+    nearest[1:] = pixel[1:] != pixel[:-1]
+    pixel, z, sample, tri = pixel[nearest], z[nearest], sample[nearest], tri[nearest]
+
+    closer = z < depth[pixel]
+    pixel, z, sample, tri = pixel[closer], z[closer], sample[closer], tri[closer]
+    depth[pixel] = z
+    shaded = sample.astype(np.float64)
+    shaded[:, :3] *= shade[tri][:, None]
+    color[pixel] = shaded.astype(np.uint8)
@@ -0,0 +1,43 @@
+from importlib import import_module
+from typing import Dict, Iterator, Mapping, Type
+
+class LazyParsers(Mapping):
+  """
+  Section index -> parser class, importing each parser module the first time it is looked up.
+  Membership tests and iterating the keys import nothing, so printing location names
+  never loads the model and texture parsers.
+  """
+  def __init__(self, paths: Dict[int, str]):
+    self._paths = paths
+    self._loaded: Dict[int, Type] = {}
+
+  def __getitem__(self, index: int) -> Type:
+    parser = self._loaded.get(index)
+    if parser is None:
+      module_name, class_name = self._paths[index].split(":")
+      parser = getattr(import_module(module_name, __package__), class_name)
+      self._loaded[index] = parser
+    return parser
+
+  def __contains__(self, index: object) -> bool:
+    return index in self._paths
+
+  def __iter__(self) -> Iterator[int]:
+    return iter(self._paths)
+
+  def __len__(self) -> int:
+    return len(self._paths)
+
+
+## Zero indexed, same as FileHeader.sections. Section 14 in the wiki is 13 here.
+SECTION_PARSERS: Mapping[int, Type] = LazyParsers({
+  7: ".section_7:Section7",
+  9: ".section_9:Section9",
+  11: ".section_11:Section11",
+  13: ".section_13:Section13",
+  15: ".section_15:Section15",
+  31: ".section_31:Section31",
+  34: ".section_34:Section34",
+  36: ".section_36:Section36",
+  41: ".section_41:Section41",
+})
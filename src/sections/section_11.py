@@ -1,6 +1,8 @@
 from dataclasses import dataclass
+from typing import ClassVar
 from .generic_script_section import GenericScriptSection
 
 @dataclass(init=False)
 class Section11(GenericScriptSection):
-  name: str = "Extends generic scripts"
\ No newline at end of file
+  name: str = "Extends generic scripts"
+  SECTION_INDEX: ClassVar[int] = 11
\ No newline at end of file
@@ -1,39 +1,49 @@
 from dataclasses import dataclass
-from typing import List
-from utils.binary_reader import BinaryReader
+from typing import ClassVar, List, Optional
+from utils.cursor import Cursor
+from utils.binary_writer import build_offset_table
 from io import BytesIO
 from utils.char_table import CharTable
+from utils.string_pool import StringPool
 
 @dataclass(init=False)
 class Section13:
   offsets: List[int]
-  location_names: List[str]
+  dialog: List[str]
+  raw_dialog: List[bytes]
 
-  def __init__(self, stream: BytesIO):
-    self.offsets = self.parse_text_offsets(stream)
-    self.dialog = self.parse_dialog(stream)
-  
-  def parse_text_offsets(self, stream: BytesIO) -> List[int]:
-    offsets: List[int] = []
-    while True:
-      offset = BinaryReader.read_uint32(stream)
-      if offset == 0:
-        break
-      offsets.append(offset)
+  SECTION_INDEX: ClassVar[int] = 13
 
-    return offsets
+  def __init__(self, stream: BytesIO, string_pool: Optional[StringPool] = None):
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      self.offsets = self.parse_text_offsets(cursor)
+      self.raw_dialog = []
+      self.dialog = self.parse_dialog(cursor, string_pool)
+  
+  def parse_text_offsets(self, cursor: Cursor) -> List[int]:
+    return cursor.read_offset_table()
     
-  def parse_dialog(self, stream: BytesIO) -> List[str]:
+  def parse_dialog(self, cursor: Cursor, string_pool: Optional[StringPool] = None) -> List[str]:
     dialogs: List[str] = []
     
     for i, offset in enumerate(self.offsets):
         start_offset = offset
-        end_offset = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(stream.getbuffer())
-        stream.seek(start_offset)
+        end_offset = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(cursor)
+        ## Out of order or out of range offsets keep whatever is there instead of failing
+        text_bytes = cursor.read_span(start_offset, end_offset - start_offset)
+        self.raw_dialog.append(text_bytes)
         
-        text_bytes = stream.read(end_offset - start_offset)
-        
-        text = CharTable.getTextFromBytes(text_bytes)
+        text = string_pool.decode(text_bytes) if string_pool else CharTable.getTextFromBytes(text_bytes)
         dialogs.append(text)
     
-    return dialogs
\ No newline at end of file
+    return dialogs
+
+  def serialize(self) -> bytes:
+    chunks: List[bytes] = []
+    for i, text in enumerate(self.dialog):
+      ## Unchanged strings keep their original bytes, padding and digraph choices included
+      if i < len(self.raw_dialog) and CharTable.getTextFromBytes(self.raw_dialog[i]) == text:
+        chunks.append(self.raw_dialog[i])
+      else:
+        chunks.append(CharTable.getBytesFromText(text))
+    return build_offset_table(chunks)
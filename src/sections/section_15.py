@@ -1,140 +1,163 @@
 from dataclasses import dataclass
-from typing import List
+from functools import cached_property
+from typing import ClassVar, Dict, List, Optional, Tuple, TYPE_CHECKING
 from sections.models.parse import Model
-from sections.textures.tim import TIM
-from utils.binary_reader import BinaryReader
+from utils.cursor import Cursor, OutOfBoundsError
+from utils.record_layout import Field, RecordLayout
 from io import BytesIO
 
+## Mesh and texture modules are only needed for exports, keep them out of plain parsing
+if TYPE_CHECKING:
+  from sections.models.geometry import MeshGeometry
+  from sections.textures.tim import TIM
+
+MODEL_OFFSET = RecordLayout(Field("offset", "H"), Field("padding", "H"))
+
 @dataclass(init=False)
 class Section15:
   offsets: List[int]
   models: List[Model]
 
-  def __init__(self, stream: BytesIO):
-    self.offsets = self.parse_offsets(stream)
-    self.models = self.parse_models(stream, self.offsets)
+  SECTION_INDEX: ClassVar[int] = 15
+
+  def __init__(self, stream: BytesIO, hardened: bool = False):
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      self.offsets = self.parse_offsets(cursor, hardened)
+      self.models = self.parse_models(cursor, self.offsets, hardened)
   
-  def parse_offsets(self, stream: BytesIO) -> List[int]:
+  def parse_offsets(self, cursor: Cursor, hardened: bool = False) -> List[int]:
+    """
+    hardened stops the table where the first model starts and reports skipped entries once,
+    instead of printing a warning per entry.
+    """
     offsets: List[int] = []
+    skipped = 0
+    end = len(cursor)
     while True:
-        offset = BinaryReader.read_uint16(stream)
-        blank_space = BinaryReader.read_uint16(stream) ## padding, I see a 15 is one of the values here, unsure why
+        if hardened and cursor.position + MODEL_OFFSET.size > end:
+            raise OutOfBoundsError(cursor.context, cursor.base + cursor.position, MODEL_OFFSET.size, cursor.base + end)
+        ## padding, I see a 15 is one of the values here, unsure why
+        offset, blank_space = cursor.read_record(MODEL_OFFSET)
         if offset == 0:
             break
         ## This catches the bad value in my wmsetus.obj. Worth checking why this exists
         if blank_space != 0:
-            print(f"Warning: Expected padding to be 0, got {blank_space} at offset {stream.tell()-2}")
+            skipped += 1
+            if not hardened:
+                print(f"Warning: Expected padding to be 0, got {blank_space} at offset {cursor.base + cursor.position - 2}")
             continue
+        ## Skipped entries are junk, only offsets that are kept bound the table
+        end = min(end, offset)
         offsets.append(offset)
+    if hardened and skipped:
+        print(f"Warning: Skipped {skipped} model table entries with non-zero padding")
     return offsets
 
-  def parse_models(self, stream: BytesIO, offsets: List[int]) -> List[Model]:
+  def parse_models(self, cursor: Cursor, offsets: List[int], hardened: bool = False) -> List[Model]:
     models: List[Model] = []
     for i, offset in enumerate(offsets):
       start_offset = offset
-      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(stream.getbuffer())
-      chunk_size = end_offset - start_offset
-      stream.seek(start_offset)
-      model_bytes = stream.read(chunk_size)
-      model_stream = BytesIO(model_bytes)
-      model = Model(model_stream)
-      models.append(model)  
+      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(cursor)
+      if not hardened:
+        ## Out of order or out of range offsets read whatever is there instead of failing early
+        start_offset = min(start_offset, len(cursor))
+        end_offset = len(cursor) if end_offset < start_offset else min(end_offset, len(cursor))
+      ## Each model reads from its own slice, so errors still give offsets within the section
+      models.append(Model(cursor.slice(start_offset, end_offset), hardened))
   
     return models
+
+  @cached_property
+  def geometry(self) -> "MeshGeometry":
+    """Bounds, normals and export-space positions for every model at once."""
+    from sections.models.geometry import MeshGeometry
+    return MeshGeometry(self.models)
   
   @staticmethod
-  def export_model_to_obj(model: Model, obj_filename: str, tim: TIM):
+  def build_mtl(material_name: str, png_path: str) -> str:
       """
-      Export a Model to a Wavefront OBJ using a TIM texture.
-      Writes .obj, .mtl, and ensures TIM PNG is saved.
+      MTL text for one textured material, png_path is relative to the MTL file.
       """
-      import os
-
-      # Ensure TIM texture is saved
-      png_filename = os.path.splitext(obj_filename)[0] + ".png"
-      tim.save_png(png_filename)
+      mtl_lines = [
+          f"# Material {material_name}",
+          f"newmtl {material_name}",
+          "Ka 1.000 1.000 1.000",
+          "Kd 1.000 1.000 1.000",
+          "Ks 0.000 0.000 0.000",
+          "d 1.0",
+          "illum 2",
+          f"map_Kd {png_path}",
+      ]
+      return "\n".join(mtl_lines) + "\n"
 
-      mtl_filename = os.path.splitext(obj_filename)[0] + ".mtl"
-      material_name = "Textured"
-
-      # --- Write MTL ---
-      with open(mtl_filename, "w") as mtl_file:
-          mtl_file.write(f"# Material for {os.path.basename(mtl_filename)}\n")
-          mtl_file.write(f"newmtl {material_name}\n")
-          mtl_file.write("Ka 1.000 1.000 1.000\n")
-          mtl_file.write("Kd 1.000 1.000 1.000\n")
-          mtl_file.write("Ks 0.000 0.000 0.000\n")
-          mtl_file.write("d 1.0\n")
-          mtl_file.write("illum 2\n")
-          mtl_file.write(f"map_Kd {os.path.basename(png_filename)}\n")
+  @staticmethod
+  def build_obj(model: Model, tim: "TIM", basename: str, mtllib: Optional[str] = None, material_name: str = "Textured") -> Tuple[str, str]:
+      """
+      Build the Wavefront OBJ and MTL text for a Model textured with a TIM.
+      basename is the shared file name without extension, e.g. "model_0";
+      the MTL references basename.png and the OBJ references basename.mtl.
+      Pass mtllib to point the OBJ at a material shared with other models instead.
+      """
+      # --- MTL ---
+      mtl_text = Section15.build_mtl(material_name, f"{basename}.png")
 
       width = tim.header.img_w
       height = tim.header.img_h
 
-      # --- Write OBJ ---
-      os.makedirs(os.path.dirname(obj_filename), exist_ok=True)
-      with open(obj_filename, "w") as obj_file:
-          obj_file.write(f"# Exported OBJ: {os.path.basename(obj_filename)}\n")
-          obj_file.write(f"mtllib {os.path.basename(mtl_filename)}\n")
-          obj_file.write(f"usemtl {material_name}\n\n")
-
-          # --- Vertices ---
-          for vertex in model.vertices:
-              x = vertex.x / 100.0
-              y = -vertex.y / 100.0  # Y-flip
-              z = vertex.z / 100.0
-              obj_file.write(f"v {x:.6f} {y:.6f} {z:.6f}\n")
-          obj_file.write("\n")
-
-          # --- UVs ---
-          uv_counter = 1
-          uv_indices = []
-
-          # Triangles
-          for tri in model.triangles:
-              for i in range(3):
-                  u = tri.texcoords1[i] if i < len(tri.texcoords1) else 0
-                  v = tri.texcoords2[i] if i < len(tri.texcoords2) else 0
-                  # Correct PS1 UV normalization
-                  uu = u / width
-                  vv = 1.0 - (v / height)
-                  uv_indices.append(uv_counter)
-                  obj_file.write(f"vt {uu:.6f} {vv:.6f}\n")
-                  uv_counter += 1
-
-          # Quads
-          for quad in model.quads:
-              tex_coords = [quad.texcoords1, quad.texcoords2, quad.texcoords3, quad.texcoords4]
-              for tex in tex_coords:
-                  if isinstance(tex, list) and len(tex) >= 2:
-                      u, v = tex[:2]
-                  else:
-                      u, v = 0, 0
-                  uu = u / width
-                  vv = 1.0 - (v / height)
-                  uv_indices.append(uv_counter)
-                  obj_file.write(f"vt {uu:.6f} {vv:.6f}\n")
-                  uv_counter += 1
-
-          obj_file.write("\n")
-
-          # --- Faces ---
-          uv_index_counter = 1
-
-          # Triangles
-          for tri in model.triangles:
-              v_idx = [i + 1 for i in tri.vertex_indices]
-              obj_file.write(
-                  f"f {v_idx[0]}/{uv_index_counter} {v_idx[1]}/{uv_index_counter+1} {v_idx[2]}/{uv_index_counter+2}\n"
-              )
-              uv_index_counter += 3
-
-          # Quads
-          for quad in model.quads:
-              v_idx = [i + 1 for i in quad.vertex_indices]
-              # Swap 2 and 3 for PS1 quad winding
-              obj_file.write(
-                  f"f {v_idx[0]}/{uv_index_counter} {v_idx[1]}/{uv_index_counter+1} "
-                  f"{v_idx[3]}/{uv_index_counter+3} {v_idx[2]}/{uv_index_counter+2}\n"
-              )
-              uv_index_counter += 4
+      # --- OBJ ---
+      obj_lines = [
+          f"# Exported OBJ: {basename}.obj",
+          f"mtllib {mtllib or basename + '.mtl'}",
+          f"usemtl {material_name}",
+          "",
+      ]
+
+      from sections.models.mesh import IndexedMesh
+      mesh = IndexedMesh.from_model(model)
+
+      # --- Vertices ---
+      for x, y, z in mesh.scaled_positions():
+          obj_lines.append(f"v {x:.6f} {y:.6f} {z:.6f}")
+      obj_lines.append("")
+
+      # --- UVs ---
+      # Welded, so every vertex has exactly one UV and shares its index
+      for uu, vv in mesh.normalized_uvs(width, height):
+          obj_lines.append(f"vt {uu:.6f} {vv:.6f}")
+      obj_lines.append("")
+
+      # --- Faces ---
+      indices = mesh.indices
+      for i in range(0, len(indices), 3):
+          a, b, c = indices[i] + 1, indices[i + 1] + 1, indices[i + 2] + 1
+          obj_lines.append(f"f {a}/{a} {b}/{b} {c}/{c}")
+
+      return "\n".join(obj_lines) + "\n", mtl_text
+
+  @staticmethod
+  def model_payloads(model: Model, obj_filename: str, tim: "TIM") -> Dict[str, bytes]:
+      """
+      Encode the .obj, .mtl and .png for a Model in memory, keyed by output path.
+      """
+      import os
+
+      base_path = os.path.splitext(obj_filename)[0]
+      obj_text, mtl_text = Section15.build_obj(model, tim, os.path.basename(base_path))
+      return {
+          obj_filename: obj_text.encode(),
+          base_path + ".mtl": mtl_text.encode(),
+          base_path + ".png": tim.encode_png(),
+      }
+
+  @staticmethod
+  def export_model_to_obj(model: Model, obj_filename: str, tim: "TIM"):
+      """
+      Export a Model to a Wavefront OBJ using a TIM texture.
+      Writes .obj, .mtl, and ensures TIM PNG is saved.
+      """
+      import os
+
+      os.makedirs(os.path.dirname(obj_filename) or ".", exist_ok=True)
+      for path, payload in Section15.model_payloads(model, obj_filename, tim).items():
+          with open(path, "wb") as f:
+              f.write(payload)
@@ -1,39 +1,49 @@
 from dataclasses import dataclass
-from typing import List
-from utils.binary_reader import BinaryReader
+from typing import ClassVar, List, Optional
+from utils.cursor import Cursor
+from utils.binary_writer import build_offset_table
 from io import BytesIO
 from utils.char_table import CharTable
+from utils.string_pool import StringPool
 
 @dataclass(init=False)
 class Section31:
   offsets: List[int]
   location_names: List[str]
+  raw_names: List[bytes]
 
-  def __init__(self, stream: BytesIO):
-    self.offsets = self.parse_text_offsets(stream)
-    self.location_names = self.parse_location_names(stream)
-  
-  def parse_text_offsets(self, stream: BytesIO) -> List[int]:
-    offsets: List[int] = []
-    while True:
-      offset = BinaryReader.read_uint32(stream)
-      if offset == 0:
-        break
-      offsets.append(offset)
+  SECTION_INDEX: ClassVar[int] = 31
 
-    return offsets
+  def __init__(self, stream: BytesIO, string_pool: Optional[StringPool] = None):
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      self.offsets = self.parse_text_offsets(cursor)
+      self.raw_names = []
+      self.location_names = self.parse_location_names(cursor, string_pool)
+  
+  def parse_text_offsets(self, cursor: Cursor) -> List[int]:
+    return cursor.read_offset_table()
     
-  def parse_location_names(self, stream: BytesIO) -> List[str]:
+  def parse_location_names(self, cursor: Cursor, string_pool: Optional[StringPool] = None) -> List[str]:
     location_names: List[str] = []
     
     for i, offset in enumerate(self.offsets):
         start_offset = offset
-        end_offset = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(stream.getbuffer())
-        stream.seek(start_offset)
+        end_offset = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(cursor)
+        ## Out of order or out of range offsets keep whatever is there instead of failing
+        name_bytes = cursor.read_span(start_offset, end_offset - start_offset)
+        self.raw_names.append(name_bytes)
         
-        name_bytes = stream.read(end_offset - start_offset)
-        
-        name = CharTable.getTextFromBytes(name_bytes)
+        name = string_pool.decode(name_bytes) if string_pool else CharTable.getTextFromBytes(name_bytes)
         location_names.append(name)
     
-    return location_names
\ No newline at end of file
+    return location_names
+
+  def serialize(self) -> bytes:
+    chunks: List[bytes] = []
+    for i, text in enumerate(self.location_names):
+      ## Unchanged strings keep their original bytes, padding and digraph choices included
+      if i < len(self.raw_names) and CharTable.getTextFromBytes(self.raw_names[i]) == text:
+        chunks.append(self.raw_names[i])
+      else:
+        chunks.append(CharTable.getBytesFromText(text))
+    return build_offset_table(chunks)
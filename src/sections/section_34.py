@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import List
-from utils.binary_reader import BinaryReader
+from typing import ClassVar, List
+from utils.cursor import Cursor
+from utils.record_layout import Field, RecordLayout
 from io import BytesIO
 
 @dataclass
@@ -9,20 +10,26 @@ class DrawPoint:
   y: int
   magicId: int
 
+DRAW_POINT = RecordLayout(Field("x", "B"), Field("y", "B"), Field("magicId", "H"), record=DrawPoint)
+
 @dataclass(init=False)
 class Section34:
+  header: bytes
   draw_points: List[DrawPoint]
+  trailing: bytes
+
+  SECTION_INDEX: ClassVar[int] = 34
 
   def __init__(self, stream: BytesIO):
-    stream.seek(44)
-    self.draw_points = self.parse_draw_points(stream)
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      ## A short section keeps what header it has and has no draw points
+      self.header = cursor.read_at_most(44)
+      self.draw_points = self.parse_draw_points(cursor)
+      ## A trailing partial record, kept so serialize gives back the same bytes
+      self.trailing = cursor.read_bytes(cursor.remaining)
   
-  def parse_draw_points(self, stream: BytesIO) -> List[DrawPoint]:
-    draw_points: List[DrawPoint] = []
-    while stream.tell() < stream.getbuffer().nbytes:
-      x = BinaryReader.read_uint8(stream)
-      y = BinaryReader.read_uint8(stream)
-      magicId = BinaryReader.read_uint16(stream)
-      draw_points.append(DrawPoint(x=x, y=y, magicId=magicId))
+  def parse_draw_points(self, cursor: Cursor) -> List[DrawPoint]:
+    return cursor.read_records(DRAW_POINT, cursor.remaining // DRAW_POINT.size)
 
-    return draw_points
\ No newline at end of file
+  def serialize(self) -> bytes:
+    return self.header + b"".join(DRAW_POINT.pack(point.x, point.y, point.magicId) for point in self.draw_points) + self.trailing
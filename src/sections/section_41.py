@@ -1,6 +1,6 @@
 from dataclasses import dataclass
-from typing import List
-from utils.binary_reader import BinaryReader
+from typing import ClassVar, List
+from utils.cursor import Cursor
 from io import BytesIO
 from .textures.tim import TIM
 
@@ -8,29 +8,29 @@ from .textures.tim import TIM
 class Section41:
   offsets: List[int]
 
-  def __init__(self, stream: BytesIO):
-    self.offsets = self.parse_text_offsets(stream)
-    self.textures = self.parse_textures(stream, self.offsets)
+  SECTION_INDEX: ClassVar[int] = 41
 
-  
-  def parse_text_offsets(self, stream: BytesIO) -> List[int]:
-    offsets: List[int] = []
-    while True:
-      offset = BinaryReader.read_uint32(stream)
-      if offset == 0:
-        break
-      offsets.append(offset)
+  def __init__(self, stream: BytesIO, hardened: bool = False):
+    self.hardened = hardened
+    with Cursor.from_stream(stream, f"section {self.SECTION_INDEX}") as cursor:
+      self.offsets = self.parse_text_offsets(cursor)
+      self.textures = self.parse_textures(cursor, self.offsets)
 
-    return offsets
   
-  def parse_textures(self, stream: BytesIO, offsets: List[int]):
+  def parse_text_offsets(self, cursor: Cursor) -> List[int]:
+    return cursor.read_offset_table(bounded=self.hardened)
+  
+  def parse_textures(self, cursor: Cursor, offsets: List[int]):
     textures: List[TIM] = []
     for i, offset in enumerate(offsets):
       start_offset = offset
-      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(stream.getbuffer())
-      chunk_size = end_offset - start_offset
-      stream.seek(start_offset)
-      texture_bytes = stream.read(chunk_size)
+      end_offset = offsets[i + 1] if i + 1 < len(offsets) else len(cursor)
+      if self.hardened:
+        cursor.seek(start_offset)
+        texture_bytes = cursor.read_bytes(end_offset - start_offset)
+      else:
+        ## Out of order or out of range offsets keep whatever is there instead of failing
+        texture_bytes = cursor.read_span(start_offset, end_offset - start_offset)
       texture_stream = BytesIO(texture_bytes)
       texture = self.parse_tim(texture_stream, f"Texture_{i}")
       textures.append(texture)
@@ -38,4 +38,8 @@ class Section41:
     return textures
 
   def parse_tim(self, stream: BytesIO, name: str) -> TIM:
-    return TIM(stream=stream, name=name)
\ No newline at end of file
+    return TIM(stream=stream, name=name, hardened=self.hardened)
+
+  def release_streams(self) -> None:
+    for texture in self.textures:
+      texture.release_stream()
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
+from typing import ClassVar
 from .generic_script_section import GenericScriptSection
 
 @dataclass(init=False)
 class Section9(GenericScriptSection):
-  name: str = "Extends generic scripts"
\ No newline at end of file
+  name: str = "Extends generic scripts"
+  SECTION_INDEX: ClassVar[int] = 9
\ No newline at end of file
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+import numpy as np
+from sections.textures.pixels import decode_rgba
+from sections.textures.tim import TIM
+
+
+@dataclass(init=False)
+class TextureCache:
+    """
+    LRU cache of decoded RGBA arrays keyed by (TIM content hash, CLUT index), bounded by
+    the total size of the cached pixels. Returned arrays are shared and read only.
+    """
+    max_bytes: int
+    current_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tim: TIM, clut: int = 0) -> np.ndarray:
+        """
+        Decoded (height, width, 4) uint8 pixels of tim, decoding only on a miss.
+        """
+        key = (tim.content_hash, clut)
+        rgba = self._entries.get(key)
+        if rgba is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return rgba
+
+        self.misses += 1
+        rgba = decode_rgba(tim, clut)
+        rgba.flags.writeable = False
+        if rgba.nbytes <= self.max_bytes:
+            self._entries[key] = rgba
+            self.current_bytes += rgba.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+        return rgba
+
+    def evict(self, content_hash: str) -> None:
+        """Drop every CLUT decoded for the TIM with this content hash."""
+        for key in [key for key in self._entries if key[0] == content_hash]:
+            self.current_bytes -= self._entries.pop(key).nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"Texture cache: {stats['entries']} textures, {stats['bytes'] / (1024 * 1024):.1f}"
+                f" of {stats['max_bytes'] / (1024 * 1024):.1f} MB, {stats['hit_rate']:.1%} hits"
+                f" ({stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions)")
+
+
+# Shared by TIM.encode_png and TIM.save_png
+texture_cache = TextureCache()
@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sections.textures.cache import TextureCache, texture_cache
+from sections.textures.tim import TIM
+
+
+def mip_count(width: int, height: int) -> int:
+    """Levels in a full chain down to 1x1, the full size level included."""
+    return (max(width, height, 1) - 1).bit_length() + 1
+
+
+## Coverage for STP texels, the GPU's default semi-transparency mode draws them as B/2 + F/2
+SEMI_TRANSPARENT_ALPHA = 128
+
+
+def ps1_coverage(rgba: np.ndarray) -> np.ndarray:
+    """
+    Alpha with PS1 semantics for decode_rgba output, which marks STP texels transparent and
+    keeps 0x0000 opaque. bgr555_to_rgba only maps a channel of 0 to 0, so the raw words can
+    be told apart from the decoded pixels: 0x0000 (opaque black) becomes transparent, STP on
+    black (0x8000, transparent black) becomes opaque black, and STP on any other color is
+    semi-transparent.
+    """
+    black = ~rgba[..., :3].any(axis=-1)
+    stp = rgba[..., 3] == 0
+    out = rgba.copy()
+    out[..., 3] = np.where(black, np.where(stp, 255, 0), np.where(stp, SEMI_TRANSPARENT_ALPHA, 255))
+    return out
+
+
+def _premultiply(rgba: np.ndarray) -> np.ndarray:
+    # Color weighted by alpha, so transparent texels add nothing to their neighbours' color
+    pixels = rgba.astype(np.float32)
+    pixels[..., :3] *= pixels[..., 3:] / 255.0
+    return pixels
+
+
+def _unpremultiply(pixels: np.ndarray) -> np.ndarray:
+    alpha = pixels[..., 3:]
+    rgb = np.divide(pixels[..., :3] * 255.0, alpha, out=np.zeros_like(pixels[..., :3]), where=alpha > 0)
+    rgba = np.concatenate((rgb, alpha), axis=-1)
+    return np.clip(np.rint(rgba), 0, 255).astype(np.uint8)
+
+
+def _box_filter(pixels: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Average factor x factor blocks of a (..., height, width, 4) float stack in one pass.
+    Sizes that do not divide evenly get a smaller last block, averaged over the texels it has.
+    """
+    height, width = pixels.shape[-3:-1]
+    out_h = -(-height // factor)
+    out_w = -(-width // factor)
+    pad_h = out_h * factor - height
+    pad_w = out_w * factor - width
+    if pad_h or pad_w:
+        padding = [(0, 0)] * (pixels.ndim - 3) + [(0, pad_h), (0, pad_w), (0, 0)]
+        pixels = np.pad(pixels, padding)
+    blocks = pixels.reshape(pixels.shape[:-3] + (out_h, factor, out_w, factor, 4))
+    sums = blocks.sum(axis=(-4, -2))
+    if not (pad_h or pad_w) or sums.size == 0:
+        return sums / (factor * factor)
+
+    rows = np.full(out_h, factor, dtype=np.float32)
+    rows[-1] -= pad_h
+    columns = np.full(out_w, factor, dtype=np.float32)
+    columns[-1] -= pad_w
+    return sums / (rows[:, None] * columns[None, :])[..., None]
+
+
+def mip_chain(rgba: np.ndarray, levels: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Halve a (height, width, 4) or (count, height, width, 4) uint8 RGBA array down to 1x1,
+    or to levels entries. Level 0 is rgba itself. Each level is filtered from the previous
+    one in premultiplied alpha, so transparent texels fade out instead of darkening the edges.
+    """
+    height, width = rgba.shape[-3:-1]
+    count = mip_count(width, height) if levels is None else min(levels, mip_count(width, height))
+    chain = [rgba]
+    pixels = _premultiply(rgba)
+    for _ in range(1, count):
+        pixels = _box_filter(pixels, 2)
+        chain.append(_unpremultiply(pixels))
+    return chain
+
+
+def downscale(rgba: np.ndarray, factors: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    rgba shrunk by each integer factor, every one filtered straight from the full size pixels.
+    """
+    for factor in factors:
+        if factor < 1:
+            raise ValueError(f"Downscale factor must be at least 1, got {factor}")
+    pixels = _premultiply(rgba)
+    return {factor: rgba if factor == 1 else _unpremultiply(_box_filter(pixels, factor)) for factor in factors}
+
+
+def build_mips(textures: Sequence[TIM], levels: Optional[int] = None, factors: Sequence[int] = (),
+               cache: TextureCache = texture_cache) -> List[Tuple[List[np.ndarray], Dict[int, np.ndarray]]]:
+    """
+    Mip chain and downscales for every texture, level 0 included, all with ps1_coverage alpha.
+    Each distinct texture is decoded once through the cache, and textures of the same size
+    are stacked and filtered together. With levels=0 no chain is built, only the factors.
+    """
+    distinct: Dict[str, int] = {}
+    for i, tim in enumerate(textures):
+        distinct.setdefault(tim.content_hash, i)
+
+    by_shape: Dict[Tuple[int, int], List[int]] = {}
+    for i in distinct.values():
+        by_shape.setdefault((textures[i].header.img_h, textures[i].header.img_w), []).append(i)
+
+    results: Dict[int, Tuple[List[np.ndarray], Dict[int, np.ndarray]]] = {}
+    for indices in by_shape.values():
+        stack = ps1_coverage(np.stack([cache.get(textures[i]) for i in indices]))
+        chain = mip_chain(stack, levels) if levels != 0 else []
+        scaled = downscale(stack, factors)
+        for n, i in enumerate(indices):
+            results[i] = ([level[n] for level in chain], {factor: pixels[n] for factor, pixels in scaled.items()})
+
+    return [results[distinct[tim.content_hash]] for tim in textures]
@@ -0,0 +1,58 @@
+import numpy as np
+from sections.textures.tim import TIM
+
+
+def bgr555_to_rgba(words: np.ndarray) -> np.ndarray:
+    """
+    (..., ) uint16 PS1 colors to (..., 4) uint8 RGBA, rounding the same way TIM.to_image does.
+    The STP bit (0x8000) becomes fully transparent.
+    """
+    words = words.astype(np.uint16)
+    rgba = np.empty(words.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = ((words & 0x1F) * 255 // 31)
+    rgba[..., 1] = (((words >> 5) & 0x1F) * 255 // 31)
+    rgba[..., 2] = (((words >> 10) & 0x1F) * 255 // 31)
+    rgba[..., 3] = np.where(words >> 15, 0, 255)
+    return rgba
+
+
+def decode_rgba(tim: TIM, clut: int = 0) -> np.ndarray:
+    """
+    Decode a TIM to a (height, width, 4) uint8 RGBA array in one vectorized pass.
+    With the default clut=0 this matches TIM.to_image pixel for pixel, including high
+    nibble first for 4bpp and transparent black where the image data runs short.
+    """
+    if tim.image_data is None:
+        raise ValueError(f"Pixels for {tim.name} have already been released")
+
+    width = tim.header.img_w
+    height = tim.header.img_h
+    data = np.frombuffer(tim.image_data, dtype=np.uint8)
+    pixel_count = width * height
+
+    if tim.header.has_palette:
+        palette_words = np.frombuffer(tim.palette_data[:len(tim.palette_data) // 2 * 2], dtype="<u2")
+        if clut:
+            colors = 16 if tim.header.bpp == 0 else 256
+            if not 0 <= clut < tim.header.nb_pal or len(palette_words) < (clut + 1) * colors:
+                raise ValueError(f"{tim.name} has no CLUT {clut}")
+            palette_words = palette_words[clut * colors:]
+        palette = bgr555_to_rgba(palette_words)
+        if tim.header.bpp == 0:
+            # Two pixels per byte, TIM.to_image reads the high nibble first
+            indices = np.empty(len(data) * 2, dtype=np.uint8)
+            indices[0::2] = data >> 4
+            indices[1::2] = data & 0xF
+        else:
+            indices = data
+        indices = indices[:pixel_count]
+        rgba = palette[np.minimum(indices, len(palette) - 1)]
+    elif clut:
+        raise ValueError(f"{tim.name} is a direct color TIM without CLUTs")
+    else:
+        words = np.frombuffer(tim.image_data[:len(tim.image_data) // 2 * 2], dtype="<u2")[:pixel_count]
+        rgba = bgr555_to_rgba(words)
+
+    if len(rgba) < pixel_count:
+        rgba = np.concatenate((rgba, np.zeros((pixel_count - len(rgba), 4), dtype=np.uint8)))
+    return rgba.reshape(height, width, 4)
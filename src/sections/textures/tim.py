@@ -1,10 +1,17 @@
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from PIL import Image  # Make sure Pillow is installed
-from typing import Optional, List, Tuple
+from typing import ClassVar, Optional, List, Tuple, TYPE_CHECKING
 from io import BytesIO
+import hashlib
 import os
-from utils.binary_reader import BinaryReader
+import sys
+from utils.cursor import Cursor
+from utils.record_layout import Field, RecordLayout
+
+## Pillow is imported by the methods that produce images, parsing does not need it
+if TYPE_CHECKING:
+    from PIL import Image
 
 @dataclass
 class TIMHeader:
@@ -28,14 +35,22 @@ class TIMHeader:
 class TIM:
     name: str
     stream: BytesIO
+    # Reject size fields that do not fit the data instead of tolerating truncation,
+    # so decoding never does more work than the bytes present allow
+    hardened: bool = False
 
     header: TIMHeader = field(init=False)
-    image_data: bytes = field(init=False)
+    image_data: Optional[bytes] = field(init=False)
     palette_data: Optional[bytes] = field(init=False)
     palette_colors: Optional[List[Tuple[float, float, float, float]]] = field(init=False)  # RGBA colors
 
 
     MAGIC_NUMBER = b'\x10\x00\x00\x00'
+    FILE_HEADER: ClassVar[RecordLayout] = RecordLayout(Field("magic", "4s"), Field("flags", "B"), Field(None, "3x"))
+    # Shared by the CLUT and image blocks: block size including this header, VRAM position and size
+    BLOCK_HEADER: ClassVar[RecordLayout] = RecordLayout(
+        Field("size", "I"), Field("x", "H"), Field("y", "H"), Field("w", "H"), Field("h", "H"),
+    )
     
     def __post_init__(self):
         success = self.parse()
@@ -69,19 +84,19 @@ class TIM:
         Returns:
             bool: True if successful
         """        
-        # Check magic number
-        if self.stream.read(4) != self.MAGIC_NUMBER:
+        with Cursor.from_stream(self.stream, self.name) as cursor:
+            return self.parse_blocks(cursor)
+
+    def parse_blocks(self, cursor: Cursor) -> bool:
+        # Magic number, flags byte and 3 bytes of padding
+        magic, flags = cursor.read_record(self.FILE_HEADER)
+        if magic != self.MAGIC_NUMBER:
             print("Invalid TIM magic number")
             return False
         
-        # Read flags byte
-        flags = ord(self.stream.read(1))
         bpp = flags & 0x03
         has_palette = bool((flags >> 3) & 1)
         
-        # Skip 3 bytes
-        self.stream.read(3)
-        
         if has_palette and bpp > 1:
             print(f"Invalid TIM flags: bpp={bpp}, has_palette={has_palette}")
             return False
@@ -92,13 +107,7 @@ class TIM:
         palette_data = None
         
         if has_palette:
-            pal_size = BinaryReader.read_uint32(self.stream)
-            
-            # Read palette header
-            pal_x = BinaryReader.read_uint16(self.stream)
-            pal_y = BinaryReader.read_uint16(self.stream)
-            pal_w = BinaryReader.read_uint16(self.stream)
-            pal_h = BinaryReader.read_uint16(self.stream)
+            pal_size, pal_x, pal_y, pal_w, pal_h = cursor.read_record(self.BLOCK_HEADER)
             
             # Calculate palette entries
             one_pal_size = 16 if bpp == 0 else 256
@@ -109,8 +118,8 @@ class TIM:
             if nb_pal <= 0:
                 return False
                 
-            # Read palette data
-            palette_data = self.stream.read(pal_size - 12)
+            # Read palette data, a truncated palette keeps what is there
+            palette_data = cursor.read_bytes(pal_size - 12) if self.hardened else cursor.read_at_most(pal_size - 12)
             
             # Parse palette colors with proper alpha handling
             self.palette_colors = []
@@ -129,11 +138,7 @@ class TIM:
                 self.palette_colors.append((r, g, b, a))
 
         # Read image header
-        img_size = BinaryReader.read_uint32(self.stream)
-        img_x = BinaryReader.read_uint16(self.stream)
-        img_y = BinaryReader.read_uint16(self.stream)
-        img_w = BinaryReader.read_uint16(self.stream)
-        img_h = BinaryReader.read_uint16(self.stream)
+        img_size, img_x, img_y, img_w, img_h = cursor.read_record(self.BLOCK_HEADER)
         
         # Adjust width based on bpp
         if bpp == 0:
@@ -158,8 +163,13 @@ class TIM:
             nb_pal=nb_pal
         )
         
-        # Read image data
-        self.image_data = self.stream.read(img_size - 12)
+        # Read image data, short image data decodes as transparent black
+        ## Outside hardened mode an img_size below 12 takes the rest of the block, as a stream read would
+        self.image_data = cursor.read_bytes(img_size - 12) if self.hardened else cursor.read_at_most(img_size - 12)
+        if self.hardened:
+            needed = (img_w * img_h * (4, 8, 16, 16)[bpp] + 7) // 8
+            if len(self.image_data) < needed:
+                raise ValueError(f"{self.name}: {img_w}x{img_h} image needs {needed} bytes, block has {len(self.image_data)}")
 
         if has_palette:
           self.palette_data = palette_data
@@ -167,11 +177,50 @@ class TIM:
         return True
       
       
-    def save_png(self, path: str):
+    @cached_property
+    def content_hash(self) -> str:
         """
-        Save the TIM image as a PNG.
+        Hash of everything that decides the decoded pixels, so identical TIMs from different
+        sections or files share one texture cache entry. VRAM placement is left out.
+        """
+        if self.image_data is None:
+            raise ValueError(f"Pixels for {self.name} have already been released")
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(bytes(f"{self.header.bpp},{self.header.has_palette},{self.header.img_w},{self.header.img_h}", "ascii"))
+        hasher.update(self.image_data)
+        if self.palette_data:
+            hasher.update(self.palette_data)
+        return hasher.hexdigest()
+
+    def release_stream(self):
+        """
+        Drop the source buffer, everything needed to decode pixels has been copied out by parse().
+        """
+        self.stream = None
+
+    def release_pixels(self):
+        """
+        Drop the raw pixel and palette data once the texture has been exported.
+        The header stays available, decoding again raises ValueError.
+        Its decoded pixels are evicted from the shared texture cache too.
+        """
+        # Only a TIM that has been hashed can have been cached, and only if the cache was imported
+        cache = sys.modules.get("sections.textures.cache")
+        if cache is not None and "content_hash" in self.__dict__:
+            cache.texture_cache.evict(self.content_hash)
+        self.stream = None
+        self.image_data = None
+        self.palette_data = None
+        self.palette_colors = None
+
+    def to_image(self) -> "Image.Image":
+        """
+        Decode the TIM into an RGBA image.
         Handles paletted (4bpp/8bpp) and direct 16-bit color images.
         """
+        if self.image_data is None:
+            raise ValueError(f"Pixels for {self.name} have already been released")
+        from PIL import Image  # Make sure Pillow is installed
         width = self.header.img_w
         height = self.header.img_h
         img = Image.new("RGBA", (width, height))
@@ -225,6 +274,30 @@ class TIM:
                     pixels[x, y] = (int(r*255), int(g*255), int(b*255), a)
                     idx += 2
 
+        return img
+
+    def encode_png(self) -> bytes:
+        """
+        Encode the TIM as PNG in memory, for writers that do the disk I/O elsewhere.
+        """
+        buffer = BytesIO()
+        self.cached_image().save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def cached_image(self, clut: int = 0) -> "Image.Image":
+        """
+        Same pixels as to_image, but decoded through the shared texture cache so
+        repeated requests for the same texture skip the decode.
+        """
+        from PIL import Image
+        from sections.textures.cache import texture_cache
+        return Image.fromarray(texture_cache.get(self, clut))
+
+    def save_png(self, path: str):
+        """
+        Save the TIM image as a PNG.
+        """
+        img = self.cached_image()
         os.makedirs(os.path.dirname(path), exist_ok=True)
         img.save(path)
         print(f"Saved TIM as PNG: {path}")
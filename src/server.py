@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+from wmset import SCRIPT_SECTIONS, WmsetFile, open_wmset
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+
+DEFAULT_FILE = "../wmsetus.obj"
+DEFAULT_PORT = 8765
+
+@dataclass
+class Response:
+  status: int
+  content_type: str
+  body: bytes
+  etag: Optional[str] = None
+
+class NotFound(Exception):
+  pass
+
+class BadRequest(Exception):
+  pass
+
+
+def _json(data: Any) -> Tuple[str, bytes]:
+  return "application/json; charset=utf-8", json.dumps(data, ensure_ascii=False).encode()
+
+def _png(rgba: Any) -> Tuple[str, bytes]:
+  from io import BytesIO
+  from PIL import Image
+  buffer = BytesIO()
+  Image.fromarray(rgba).save(buffer, format="PNG")
+  return "image/png", buffer.getvalue()
+
+def _int_param(query: Dict[str, str], name: str, default: int, low: int, high: int) -> int:
+  value = query.get(name)
+  if value is None:
+    return default
+  try:
+    number = int(value)
+  except ValueError:
+    raise BadRequest(f"{name} must be an integer, got {value!r}") from None
+  if not low <= number <= high:
+    raise BadRequest(f"{name} must be between {low} and {high}, got {number}")
+  return number
+
+def _item(items: Sequence[Any], index: str) -> Any:
+  if int(index) >= len(items):
+    raise NotFound(f"Index {index} out of range, there are {len(items)}")
+  return items[int(index)]
+
+
+class QueryService:
+  """
+  Keeps one parsed wmset resident and answers queries against it.
+  Sections are parsed the first time a route needs them, rendered responses are kept in
+  an LRU cache, and every response carries an ETag built from the hashes of the sections
+  it was made from, so clients can revalidate without anything being parsed or rendered.
+  """
+  def __init__(self, wmset: WmsetFile, cache_entries: int = 256):
+    self.wmset = wmset
+    self.cache_entries = cache_entries
+    self.hits = 0
+    self.misses = 0
+    self._cache: "OrderedDict[str, Response]" = OrderedDict()
+    ## Parsing and the texture cache are not thread safe, requests are answered one at a time
+    self._lock = threading.Lock()
+    ## pattern, sections the response depends on (None for all of them), handler
+    self.routes: List[Tuple[re.Pattern, Callable[[re.Match], Optional[Sequence[int]]], Callable[..., Tuple[str, bytes]]]] = [
+      (re.compile(r"/"), lambda m: None, self.index),
+      (re.compile(r"/sections"), lambda m: None, self.sections),
+      (re.compile(r"/sections/(\d+)"), lambda m: (int(m[1]),), self.section_bytes),
+      (re.compile(r"/names"), lambda m: (31,), self.names),
+      (re.compile(r"/names/(\d+)"), lambda m: (31,), self.names),
+      (re.compile(r"/dialog"), lambda m: (13,), self.dialog),
+      (re.compile(r"/dialog/(\d+)"), lambda m: (13,), self.dialog),
+      (re.compile(r"/drawpoints"), lambda m: (34,), self.draw_points),
+      (re.compile(r"/scripts/(\d+)"), lambda m: (int(m[1]),), self.scripts),
+      (re.compile(r"/textures/(\d+)\.png"), lambda m: (41,), self.texture_png),
+      (re.compile(r"/models/(\d+)\.glb"), lambda m: (15, 41), self.model_glb),
+      (re.compile(r"/models/(\d+)\.png"), lambda m: (15, 41), self.model_png),
+    ]
+
+  def etag(self, key: str, sections: Optional[Sequence[int]]) -> str:
+    hashes = self.wmset.section_hashes
+    hasher = hashlib.blake2b(key.encode(), digest_size=16)
+    for index in range(len(hashes)) if sections is None else sections:
+      if index >= len(hashes):
+        raise NotFound(f"No section {index}, there are {len(hashes)}")
+      hasher.update(hashes[index].encode())
+    return f'"{hasher.hexdigest()}"'
+
+  def get(self, target: str, if_none_match: Optional[str] = None) -> Response:
+    url = urlsplit(target)
+    path = url.path.rstrip("/") or "/"
+    query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+    key = f"{path}?{url.query}"
+
+    with self._lock:
+      for pattern, dependencies, handler in self.routes:
+        match = pattern.fullmatch(path)
+        if match is None:
+          continue
+        try:
+          etag = self.etag(key, dependencies(match))
+          if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(304, "", b"", etag)
+
+          cached = self._cache.get(etag)
+          if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(etag)
+            return cached
+
+          self.misses += 1
+          content_type, body = handler(match, query)
+        except NotFound as e:
+          return Response(404, *_json({"error": str(e)}))
+        except BadRequest as e:
+          return Response(400, *_json({"error": str(e)}))
+        except (ValueError, KeyError, IndexError) as e:
+          return Response(500, *_json({"error": f"{type(e).__name__}: {e}"}))
+
+        response = Response(200, content_type, body, etag)
+        self._cache[etag] = response
+        if len(self._cache) > self.cache_entries:
+          self._cache.popitem(last=False)
+        return response
+
+    return Response(404, *_json({"error": f"No route for {path}"}))
+
+  def index(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    return _json({
+      "path": self.wmset.path,
+      "sections": len(self.wmset.header.sections),
+      "routes": [pattern.pattern for pattern, _, _ in self.routes],
+    })
+
+  def sections(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    header = self.wmset.header
+    return _json([
+      {"index": i, "offset": header.offsets[i], "size": header.sections[i].getbuffer().nbytes,
+       "hash": self.wmset.section_hashes[i]}
+      for i in range(len(header.sections))
+    ])
+
+  def section_bytes(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    return "application/octet-stream", self.wmset.header.sections[int(match[1])].getvalue()
+
+  def names(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    from ndjson_export import iter_location_names
+    records = list(iter_location_names(self.wmset))
+    return _json(_item(records, match[1]) if match.lastindex else records)
+
+  def dialog(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    from ndjson_export import iter_dialog
+    records = list(iter_dialog(self.wmset))
+    return _json(_item(records, match[1]) if match.lastindex else records)
+
+  def draw_points(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    from ndjson_export import iter_draw_points
+    return _json(list(iter_draw_points(self.wmset)))
+
+  def scripts(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    section = int(match[1])
+    if section not in SCRIPT_SECTIONS:
+      raise NotFound(f"Section {section} is not a script section, expected one of {SCRIPT_SECTIONS}")
+    return _json([
+      {"entity": e, "scripts": [[[opcode.code, opcode.param1, opcode.param2] for opcode in script.opcodes] for script in entity.scripts]}
+      for e, entity in enumerate(self.wmset.scripts(section).entities)
+    ])
+
+  def texture_png(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    return "image/png", _item(self.wmset.textures.textures, match[1]).encode_png()
+
+  def model_glb(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    from sections.models.gltf import build_glb
+    i = int(match[1])
+    model = _item(self.wmset.models.models, match[1])
+    return "model/gltf-binary", build_glb(model, _item(self.wmset.textures.textures, match[1]), f"model_{i}")
+
+  def model_png(self, match: re.Match, query: Dict[str, str]) -> Tuple[str, bytes]:
+    from sections.models.thumbnail import render_thumbnails
+    size = _int_param(query, "size", 128, 16, 1024)
+    model = _item(self.wmset.models.models, match[1])
+    texture = _item(self.wmset.textures.textures, match[1])
+    return _png(render_thumbnails([model], [texture], size)[0])
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+  server_version = "wmset-query/1"
+
+  def do_GET(self) -> None:
+    self.respond(send_body=True)
+
+  def do_HEAD(self) -> None:
+    self.respond(send_body=False)
+
+  def respond(self, send_body: bool) -> None:
+    response = self.server.service.get(self.path, self.headers.get("If-None-Match"))
+    self.send_response(response.status)
+    if response.etag:
+      self.send_header("ETag", response.etag)
+      self.send_header("Cache-Control", "no-cache")
+    if response.status != 304:
+      self.send_header("Content-Type", response.content_type)
+      self.send_header("Content-Length", str(len(response.body)))
+    self.end_headers()
+    if send_body and response.status != 304:
+      self.wfile.write(response.body)
+
+  def log_message(self, format: str, *args: Any) -> None:
+    if self.server.verbose:
+      super().log_message(format, *args)
+
+
+def make_server(wmset: WmsetFile, host: str = "127.0.0.1", port: int = DEFAULT_PORT, verbose: bool = False) -> ThreadingHTTPServer:
+  server = ThreadingHTTPServer((host, port), QueryHandler)
+  server.service = QueryService(wmset)
+  server.verbose = verbose
+  return server
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Serve a parsed wmset file over local HTTP")
+  parser.add_argument("file", nargs="?", default=DEFAULT_FILE)
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+  parser.add_argument("--verbose", action="store_true", help="log every request")
+  args = parser.parse_args()
+
+  try:
+    server = make_server(open_wmset(args.file), args.host, args.port, args.verbose)
+  except (FileNotFoundError, ValueError) as e:
+    print(f"Error: {e}", file=sys.stderr)
+    sys.exit(1)
+  print(f"Serving {args.file} on http://{args.host}:{server.server_address[1]}/")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
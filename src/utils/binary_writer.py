@@ -0,0 +1,14 @@
+import struct
+from typing import List
+
+def build_offset_table(chunks: List[bytes]) -> bytes:
+  """
+  Zero terminated uint32 offset table followed by the chunks, as used by sections 13, 31 and 41.
+  Inverse of Cursor.read_offset_table.
+  """
+  offsets: List[int] = []
+  position = 4 * (len(chunks) + 1)
+  for chunk in chunks:
+    offsets.append(position)
+    position += len(chunk)
+  return struct.pack(f"<{len(offsets) + 1}I", *offsets, 0) + b"".join(chunks)
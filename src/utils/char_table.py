@@ -177,17 +177,24 @@ class CharTable:
     
     # Instance variable for character tables (can have multiple tables for Japanese)
     tables: List[List[str]] = field(default_factory=list)
+
+    # Encoder trie for the default tables, shared by every instance that uses them
+    _DEFAULT_TRIE: ClassVar[Optional[Dict]] = None
     
     def __post_init__(self):
         """Initialize with default character table if none provided."""
         if not self.tables:
-            # Create default table from the lookup dictionary
-            # Tables store characters from 0x20 onwards
-            default_table = [''] * 224  # 256 - 0x20 = 236 slots
-            for byte_val, char in self.DEFAULT_CHAR_TABLE.items():
-                if byte_val >= 0x20:
-                    default_table[byte_val - 0x20] = char
-            self.tables = [default_table]
+            self.tables = [self._default_table()]
+
+    @classmethod
+    def _default_table(cls) -> List[str]:
+        # Create default table from the lookup dictionary
+        # Tables store characters from 0x20 onwards
+        default_table = [''] * 224  # 256 - 0x20 = 236 slots
+        for byte_val, char in cls.DEFAULT_CHAR_TABLE.items():
+            if byte_val >= 0x20:
+                default_table[byte_val - 0x20] = char
+        return default_table
     
     def caract(self, ord_val: int, table: int = 0) -> str:
         """
@@ -342,4 +349,97 @@ class CharTable:
             
             i += 1
         
-        return ''.join(result)
\ No newline at end of file
+        return ''.join(result)
+
+    @staticmethod
+    def getBytesFromText(text: str, tables: Optional[List[List[str]]] = None, terminate: bool = True) -> bytes:
+        """
+        Convert a string to FF8 encoded bytes, the inverse of getTextFromBytes.
+        
+        Args:
+            text: Text as produced by fromFF8, control codes included
+            tables: Optional character tables (for Japanese support)
+            terminate: Append the 0x00 end of string marker
+            
+        Returns:
+            Encoded bytes
+        """
+        encoder = CharTable(tables=tables if tables else [])
+        return encoder.toFF8(text, terminate)
+
+    def _encoder_trie(self) -> Dict:
+        """
+        Build the text -> bytes trie, once.
+        Every entry is made by decoding a one byte character or a two byte control
+        sequence with fromFF8, so fromFF8(toFF8(text)) == text holds by construction.
+        Where several byte sequences decode to the same text the lowest one wins.
+        """
+        trie = getattr(self, "_trie", None)
+        if trie is not None:
+            return trie
+        uses_default = self.tables == [self._default_table()]
+        if uses_default and CharTable._DEFAULT_TRIE is not None:
+            self._trie = CharTable._DEFAULT_TRIE
+            return self._trie
+
+        entries: Dict[str, bytes] = {}
+        for byte in range(0x01, 0x100):
+            if 0x03 <= byte <= 0x1F:  # Control byte, always followed by a parameter
+                for param in range(0x100):
+                    sequence = bytes((byte, param))
+                    entries.setdefault(self.fromFF8(sequence), sequence)
+            else:
+                sequence = bytes((byte,))
+                entries.setdefault(self.fromFF8(sequence), sequence)
+
+        trie: Dict = {}
+        for text, sequence in entries.items():
+            node = trie
+            for character in text:
+                node = node.setdefault(character, {})
+            node[None] = sequence
+
+        self._trie = trie
+        if uses_default:
+            CharTable._DEFAULT_TRIE = trie
+        return trie
+
+    def toFF8(self, text: str, terminate: bool = True) -> bytes:
+        """
+        Encode text to FF8 bytes in one pass, taking the longest match at each position.
+        
+        Args:
+            text: Text to encode, control codes like {Squall} or {x0312} included
+            terminate: Append the 0x00 end of string marker
+            
+        Returns:
+            Encoded bytes
+        """
+        trie = self._encoder_trie()
+        result = bytearray()
+        i = 0
+        length = len(text)
+
+        while i < length:
+            node = trie
+            match = None
+            match_end = i
+            j = i
+            while j < length:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                sequence = node.get(None)
+                if sequence is not None:
+                    match = sequence
+                    match_end = j
+            
+            if match is None:
+                raise ValueError(f"Cannot encode {text[i]!r} at position {i} of {text!r}")
+            result += match
+            i = match_end
+
+        if terminate:
+            result.append(0x00)
+        return bytes(result)
\ No newline at end of file
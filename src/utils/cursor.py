@@ -0,0 +1,139 @@
+from io import BytesIO
+from typing import Any, List, Union
+import struct
+from utils.record_layout import RecordLayout
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+UINT8 = struct.Struct("<B")
+UINT16 = struct.Struct("<H")
+UINT32 = struct.Struct("<I")
+INT16 = struct.Struct("<h")
+
+class OutOfBoundsError(ValueError):
+  """
+  A read ran past the end of its buffer. offset is relative to the start of the
+  section (or file) named by context, not to the buffer the cursor was given.
+  """
+  def __init__(self, context: str, offset: int, size: int, end: int):
+    super().__init__(f"{context}: reading {size} bytes at offset {offset:#x} runs past the end at {end:#x}")
+    self.context = context
+    self.offset = offset
+    self.size = size
+    self.end = end
+
+
+class Cursor:
+  """
+  Reads little endian values at an integer position in a memoryview, without copying
+  the buffer or building a bytes object per read. Every read is bounds checked.
+  context names the data in errors, base is where this buffer starts inside it.
+  """
+  __slots__ = ("view", "position", "context", "base")
+
+  def __init__(self, data: Buffer, context: str = "data", position: int = 0, base: int = 0):
+    self.view = memoryview(data)
+    self.position = position
+    self.context = context
+    self.base = base
+
+  @classmethod
+  def from_stream(cls, stream: BytesIO, context: str) -> "Cursor":
+    """Cursor over a section stream from FileHeader.sections, starting at the stream's position."""
+    return cls(stream.getbuffer(), context, stream.tell())
+
+  def release(self) -> None:
+    """Drop the view so the underlying BytesIO can be closed or resized."""
+    self.view.release()
+
+  def __enter__(self) -> "Cursor":
+    return self
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    self.release()
+
+  def __len__(self) -> int:
+    return len(self.view)
+
+  @property
+  def remaining(self) -> int:
+    return len(self.view) - self.position
+
+  def _take(self, size: int) -> int:
+    position = self.position
+    if size < 0 or position + size > len(self.view):
+      raise OutOfBoundsError(self.context, self.base + position, size, self.base + len(self.view))
+    self.position = position + size
+    return position
+
+  def seek(self, position: int) -> None:
+    if not 0 <= position <= len(self.view):
+      raise OutOfBoundsError(self.context, self.base + position, 0, self.base + len(self.view))
+    self.position = position
+
+  def skip(self, size: int) -> None:
+    self._take(size)
+
+  def read_uint8(self) -> int:
+    return UINT8.unpack_from(self.view, self._take(1))[0]
+
+  def read_uint16(self) -> int:
+    return UINT16.unpack_from(self.view, self._take(2))[0]
+
+  def read_uint32(self) -> int:
+    return UINT32.unpack_from(self.view, self._take(4))[0]
+
+  def read_int16(self) -> int:
+    return INT16.unpack_from(self.view, self._take(2))[0]
+
+  def read_bytes(self, size: int) -> bytes:
+    position = self._take(size)
+    return self.view[position:position + size].tobytes()
+
+  def read_at_most(self, size: int) -> bytes:
+    """
+    Up to size bytes, or everything left if size is negative, like BytesIO.read.
+    For parsers that keep whatever is there when a size field is wrong.
+    """
+    return self.read_bytes(self.remaining if size < 0 else min(size, self.remaining))
+
+  def read_span(self, start: int, size: int) -> bytes:
+    """read_at_most after a seek that clamps to the buffer, so an offset past the end gives b""."""
+    self.position = min(max(start, 0), len(self.view))
+    return self.read_at_most(size)
+
+  def read_uint32s(self, count: int) -> List[int]:
+    position = self._take(count * 4)
+    return list(struct.unpack_from(f"<{count}I", self.view, position))
+
+  def read_record(self, layout: RecordLayout) -> Any:
+    return layout.unpack(self.view, self._take(layout.size))
+
+  def read_records(self, layout: RecordLayout, count: int) -> List[Any]:
+    return layout.unpack_array(self.view, count, self._take(layout.size * count))
+
+  def read_offset_table(self, bounded: bool = False) -> List[int]:
+    """
+    Zero terminated uint32 table, as used by the text, texture and script sections.
+    Raises OutOfBoundsError if the buffer ends before the terminator, or with bounded,
+    if the table runs into the data its smallest offset so far points at.
+    """
+    offsets: List[int] = []
+    start = self.position
+    end = len(self.view)
+    for (value,) in UINT32.iter_unpack(self.view[start:start + self.remaining // 4 * 4]):
+      if value == 0:
+        self.position = start + (len(offsets) + 1) * 4
+        return offsets
+      offsets.append(value)
+      if bounded:
+        end = min(end, value)
+        if start + (len(offsets) + 1) * 4 > end:
+          break
+    raise OutOfBoundsError(self.context, self.base + start + len(offsets) * 4, 4, self.base + end)
+
+  def slice(self, start: int, end: int) -> "Cursor":
+    """Cursor over [start, end) of this buffer that still reports offsets relative to the whole."""
+    if not 0 <= start <= end <= len(self.view):
+      raise OutOfBoundsError(self.context, self.base + start, end - start, self.base + len(self.view))
+    return Cursor(self.view[start:end], self.context, 0, self.base + start)
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+import gc
+import os
+import sys
+
+try:
+  import resource
+except ImportError:  # Windows
+  resource = None
+
+class MemoryBudgetExceeded(MemoryError):
+  pass
+
+
+def current_rss() -> int:
+  """
+  Resident set size of this process in bytes, or the peak if the current value is unavailable.
+  """
+  try:
+    with open("/proc/self/statm") as f:
+      return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+  except (OSError, ValueError, IndexError, AttributeError):
+    return peak_rss()
+
+
+def peak_rss() -> int:
+  """
+  Highest resident set size of this process so far, in bytes.
+  """
+  if resource is None:
+    return 0
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  ## Linux reports kilobytes, macOS reports bytes
+  return peak if sys.platform == "darwin" else peak * 1024
+
+
+def texture_cache_bytes() -> int:
+  """
+  Bytes held by the shared texture cache, 0 if nothing has imported it yet.
+  """
+  cache = sys.modules.get("sections.textures.cache")
+  return cache.texture_cache.current_bytes if cache is not None else 0
+
+
+@dataclass(init=False)
+class MemoryBudget:
+  """
+  RSS ceiling for batch runs. check() collects garbage before giving up, then raises
+  MemoryBudgetExceeded naming whatever was being processed and how much of the RSS
+  the shared texture cache holds.
+  """
+  limit: int
+  peak: int
+
+  def __init__(self, limit_mb: float):
+    self.limit = int(limit_mb * 1024 * 1024)
+    self.peak = current_rss()
+
+  def check(self, context: str) -> None:
+    rss = current_rss()
+    if rss > self.limit:
+      gc.collect()
+      rss = current_rss()
+    self.peak = max(self.peak, rss)
+    if rss > self.limit:
+      raise MemoryBudgetExceeded(f"RSS {rss / 2**20:.1f} MiB exceeds budget of {self.limit / 2**20:.1f} MiB after {context}"
+                                 f" ({texture_cache_bytes() / 2**20:.1f} MiB in the texture cache)")
+
+  def report(self) -> str:
+    return (f"Peak RSS: {max(self.peak, peak_rss()) / 2**20:.1f} MiB (budget {self.limit / 2**20:.1f} MiB),"
+            f" texture cache {texture_cache_bytes() / 2**20:.1f} MiB")
@@ -0,0 +1,149 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, List, Tuple
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+class OutputWriteError(Exception):
+  def __init__(self, errors: List[Tuple[str, BaseException]]):
+    self.errors = errors
+    details = "\n".join(f" - {path}: {error}" for path, error in errors)
+    super().__init__(f"Failed to write {len(errors)} file(s):\n{details}")
+
+
+def _write_file(path: str, data: bytes) -> None:
+  os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+  with open(path, "wb") as f:
+    f.write(data)
+
+
+@dataclass(init=False)
+class DirectoryWriter:
+  """
+  Writes each payload straight to disk under root, blocking the caller.
+  """
+  root: str
+
+  def __init__(self, root: str):
+    self.root = root
+
+  def write(self, name: str, data: bytes) -> None:
+    _write_file(os.path.join(self.root, name), data)
+
+  def close(self) -> None:
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    try:
+      self.close()
+    except OutputWriteError:
+      ## Don't hide whatever stopped the export in the first place
+      if exc_type is None:
+        raise
+
+
+@dataclass(init=False)
+class BackgroundWriter(DirectoryWriter):
+  """
+  Hands payloads to a small thread pool so encoding can carry on while files flush.
+  At most max_pending payloads are held in memory; write() blocks once that many
+  are queued. Failures are collected and raised together from close().
+  """
+  max_workers: int
+  max_pending: int
+  errors: List[Tuple[str, BaseException]]
+
+  def __init__(self, root: str, max_workers: int = 4, max_pending: int = 32):
+    super().__init__(root)
+    self.max_workers = max_workers
+    self.max_pending = max_pending
+    self.errors = []
+    self._slots = threading.BoundedSemaphore(max_pending)
+    self._lock = threading.Lock()
+    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wmset-writer")
+
+  def write(self, name: str, data: bytes) -> None:
+    path = os.path.join(self.root, name)
+    self._slots.acquire()
+    try:
+      future = self._executor.submit(_write_file, path, data)
+    except BaseException:
+      self._slots.release()
+      raise
+    future.add_done_callback(lambda done: self._finished(path, done))
+
+  def _finished(self, path: str, future: Future) -> None:
+    self._slots.release()
+    error = future.exception()
+    if error is not None:
+      with self._lock:
+        self.errors.append((path, error))
+
+  def close(self) -> None:
+    self._executor.shutdown(wait=True)
+    if self.errors:
+      raise OutputWriteError(self.errors)
+
+
+@dataclass(init=False)
+class ArchiveWriter:
+  """
+  Streams every payload into a single .zip or .tar (.tar.gz, .tgz) file instead of
+  one file per output, and appends an index.json listing the entries on close.
+  Nothing is written to disk outside the archive itself.
+  """
+  path: str
+  index: List[Dict[str, object]]
+
+  INDEX_NAME = "index.json"
+  ## Already compressed, deflating them again only costs time
+  STORED_EXTENSIONS = (".png",)
+
+  def __init__(self, path: str):
+    self.path = path
+    self.index = []
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".zip"):
+      self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+      self._tar = None
+    elif path.endswith((".tar", ".tar.gz", ".tgz")):
+      self._zip = None
+      self._tar = tarfile.open(path, "w:gz" if path.endswith(("gz", ".tgz")) else "w")
+    else:
+      raise ValueError(f"Unsupported archive type for {path}, expected .zip, .tar, .tar.gz or .tgz")
+
+  def write(self, name: str, data: bytes) -> None:
+    self._add(name, data)
+    self.index.append({"name": name, "size": len(data)})
+
+  def _add(self, name: str, data: bytes) -> None:
+    if self._zip is not None:
+      compression = zipfile.ZIP_STORED if name.endswith(self.STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+      self._zip.writestr(name, data, compress_type=compression)
+    else:
+      info = tarfile.TarInfo(name)
+      info.size = len(data)
+      info.mtime = int(time.time())
+      self._tar.addfile(info, BytesIO(data))
+
+  def close(self) -> None:
+    archive = self._zip if self._zip is not None else self._tar
+    if archive is None:
+      return
+    self._add(self.INDEX_NAME, json.dumps({"entries": self.index}, indent=2).encode())
+    archive.close()
+    self._zip = self._tar = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    self.close()
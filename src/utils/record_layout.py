@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from itertools import starmap
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+import struct
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+@dataclass(frozen=True)
+class Field:
+  """
+  One field of a fixed size record. count > 1 repeats fmt and decodes to a list,
+  name None with a pad format ("3x") skips bytes without producing a value.
+  """
+  name: Optional[str]
+  fmt: str
+  count: int = 1
+
+  @property
+  def value_count(self) -> int:
+    return 0 if self.fmt.endswith("x") else self.count
+
+
+class RecordLayout:
+  """
+  A little endian record declared once as a list of fields and compiled to a single struct.Struct.
+  unpack_array and iter_unpack decode many consecutive records in one call.
+  With a record type, decoded values are passed to it positionally, one argument per named field.
+  """
+  def __init__(self, *fields: Field, record: Optional[Callable[..., Any]] = None):
+    self.fields = fields
+    self.names = tuple(field.name for field in fields if field.value_count)
+    self.struct = struct.Struct("<" + "".join(field.fmt * field.count for field in fields))
+    self.size = self.struct.size
+    self.record = record
+
+    ## Only fields that decode to lists need regrouping, flat layouts use the struct's tuples as they are
+    self._groups: Optional[List[Tuple[int, int]]] = None
+    if any(field.value_count > 1 for field in fields):
+      self._groups = []
+      position = 0
+      for field in fields:
+        if field.value_count:
+          self._groups.append((position, field.value_count))
+          position += field.value_count
+
+  def _group(self, values: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    return tuple(values[start] if count == 1 else list(values[start:start + count]) for start, count in self._groups)
+
+  def _build(self, values: Tuple[Any, ...]) -> Any:
+    if self._groups is not None:
+      values = self._group(values)
+    return self.record(*values) if self.record else values
+
+  def unpack(self, buffer: Buffer, offset: int = 0) -> Any:
+    """One record at offset."""
+    return self._build(self.struct.unpack_from(buffer, offset))
+
+  def unpack_array(self, buffer: Buffer, count: int, offset: int = 0) -> List[Any]:
+    """count consecutive records starting at offset, raises struct.error if the buffer is too short."""
+    view = memoryview(buffer)[offset:offset + count * self.size]
+    if len(view) < count * self.size:
+      raise struct.error(f"unpack_array requires a buffer of {count * self.size} bytes, got {len(view)}")
+    return list(self._iter(view))
+
+  def iter_unpack(self, buffer: Buffer, offset: int = 0) -> Iterator[Any]:
+    """Records from offset to the end of the buffer, a trailing partial record is ignored."""
+    view = memoryview(buffer)[offset:]
+    return self._iter(view[:len(view) // self.size * self.size])
+
+  def _iter(self, view: memoryview) -> Iterator[Any]:
+    values = self.struct.iter_unpack(view)
+    if self._groups is not None:
+      values = map(self._group, values)
+    return starmap(self.record, values) if self.record else values
+
+  def pack(self, *values: Any) -> bytes:
+    """Inverse of unpack, list fields are passed as one sequence each."""
+    if self._groups is not None:
+      flat: List[Any] = []
+      for value, (_, count) in zip(values, self._groups):
+        if count == 1:
+          flat.append(value)
+        else:
+          flat.extend(value)
+      values = tuple(flat)
+    return self.struct.pack(*values)
+
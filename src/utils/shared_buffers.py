@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+import sys
+import numpy as np
+
+if TYPE_CHECKING:
+  from sections.models.parse import Model
+  from sections.textures.tim import TIM
+
+ALIGNMENT = 64
+
+@dataclass(frozen=True)
+class SharedArray:
+  offset: int
+  shape: Tuple[int, ...]
+  dtype: str
+
+@dataclass(frozen=True)
+class SharedDescriptor:
+  """
+  Small, picklable description of a published block. Send this to workers instead of the data.
+  """
+  block: str
+  size: int
+  arrays: Dict[str, SharedArray] = field(default_factory=dict)
+
+
+@dataclass(init=False)
+class SharedArrays:
+  """
+  NumPy arrays living in one multiprocessing.shared_memory block.
+  The publishing process owns the block and must unlink() it once workers are done;
+  attached workers only close() their mapping.
+  """
+  descriptor: SharedDescriptor
+  arrays: Dict[str, np.ndarray]
+
+  def __init__(self, memory: shared_memory.SharedMemory, descriptor: SharedDescriptor, owner: bool):
+    self._memory = memory
+    self._owner = owner
+    self.descriptor = descriptor
+    self.arrays = {
+      name: np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=memory.buf, offset=spec.offset)
+      for name, spec in descriptor.arrays.items()
+    }
+
+  def __getitem__(self, name: str) -> np.ndarray:
+    return self.arrays[name]
+
+  def close(self) -> None:
+    ## Views must go before the mapping, or SharedMemory.close raises BufferError
+    self.arrays = {}
+    self._memory.close()
+
+  def unlink(self) -> None:
+    if self._owner:
+      self._memory.unlink()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    self.close()
+    self.unlink()
+
+
+def publish(arrays: Dict[str, np.ndarray], name: Optional[str] = None) -> SharedArrays:
+  """
+  Copy arrays into a single new shared memory block, each one 64 byte aligned.
+  """
+  layout: Dict[str, SharedArray] = {}
+  position = 0
+  for key, array in arrays.items():
+    position = -(-position // ALIGNMENT) * ALIGNMENT
+    layout[key] = SharedArray(position, tuple(array.shape), array.dtype.str)
+    position += array.nbytes
+
+  memory = shared_memory.SharedMemory(name=name, create=True, size=max(position, 1))
+  descriptor = SharedDescriptor(memory.name, memory.size, layout)
+  shared = SharedArrays(memory, descriptor, owner=True)
+  for key, array in arrays.items():
+    shared.arrays[key][...] = array
+  return shared
+
+
+def attach(descriptor: SharedDescriptor) -> SharedArrays:
+  """
+  Map a published block in a worker without copying anything.
+  """
+  if sys.version_info >= (3, 13):
+    memory = shared_memory.SharedMemory(name=descriptor.block, track=False)
+  else:
+    ## Before 3.13 attaching registers the block with the resource tracker. Children of a
+    ## multiprocessing parent share its tracker, where that adds nothing to the owner's entry.
+    ## A process with its own tracker would unlink the block at exit, so it drops the entry again.
+    import multiprocessing
+    from multiprocessing import resource_tracker
+    memory = shared_memory.SharedMemory(name=descriptor.block)
+    if multiprocessing.parent_process() is None:
+      resource_tracker.unregister(memory._name, "shared_memory")
+  return SharedArrays(memory, descriptor, owner=False)
+
+
+def publish_models(models: Sequence["Model"]) -> SharedArrays:
+  """
+  Publish the packed vertex and face arrays of a whole Section15 set.
+  Model i owns positions[vertex_offsets[i]:vertex_offsets[i + 1]] and likewise for faces;
+  face indices are into the packed positions.
+  """
+  from sections.models.geometry import MeshGeometry
+  geometry = MeshGeometry(models)
+  return publish({
+    "positions": np.ascontiguousarray(geometry.positions),
+    "faces": geometry.faces,
+    "vertex_offsets": geometry.vertex_offsets,
+    "face_offsets": geometry.face_offsets,
+  })
+
+
+def publish_textures(textures: Sequence["TIM"]) -> SharedArrays:
+  """
+  Publish decoded RGBA pixels and the raw index/pixel data of every TIM.
+  rgba is packed row-major per texture; texture_info rows are
+  (rgba texel offset, width, height, raw offset, raw length).
+  """
+  from sections.textures.pixels import decode_rgba
+  rgba = [decode_rgba(tim).reshape(-1, 4) for tim in textures]
+  raw = [np.frombuffer(tim.image_data, dtype=np.uint8) for tim in textures]
+  info = np.zeros((len(textures), 5), dtype=np.int64)
+  texel_offset = raw_offset = 0
+  for i, tim in enumerate(textures):
+    info[i] = (texel_offset, tim.header.img_w, tim.header.img_h, raw_offset, len(raw[i]))
+    texel_offset += len(rgba[i])
+    raw_offset += len(raw[i])
+
+  return publish({
+    "rgba": np.concatenate(rgba) if rgba else np.zeros((0, 4), dtype=np.uint8),
+    "raw": np.concatenate(raw) if raw else np.zeros(0, dtype=np.uint8),
+    "texture_info": info,
+  })
+
+
+def texture_rgba(shared: SharedArrays, index: int) -> np.ndarray:
+  """(height, width, 4) view of one texture from a publish_textures block."""
+  offset, width, height, _, _ = (int(v) for v in shared["texture_info"][index])
+  return shared["rgba"][offset:offset + width * height].reshape(height, width, 4)
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from utils.char_table import CharTable
+import sys
+
+@dataclass(init=False)
+class StringPool:
+  """
+  Decodes FF8 strings once per distinct byte sequence and hands out the same interned str
+  every time those bytes come up again, across sections and across files.
+  """
+  strings: Dict[bytes, str]
+  lookups: int
+  hits: int
+  duplicate_bytes: int
+
+  def __init__(self, tables: Optional[List[List[str]]] = None):
+    self.strings = {}
+    self.lookups = 0
+    self.hits = 0
+    self.duplicate_bytes = 0
+    self._decoder = CharTable(tables=tables if tables else [])
+
+  def decode(self, data: bytes) -> str:
+    self.lookups += 1
+    text = self.strings.get(data)
+    if text is not None:
+      self.hits += 1
+      self.duplicate_bytes += len(data)
+      return text
+
+    text = sys.intern(self._decoder.fromFF8(data))
+    self.strings[bytes(data)] = text
+    return text
+
+  def stats(self) -> Dict[str, float]:
+    return {
+      "unique": len(self.strings),
+      "lookups": self.lookups,
+      "hits": self.hits,
+      "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+      "duplicate_bytes": self.duplicate_bytes,
+    }
+
+  def report(self) -> str:
+    stats = self.stats()
+    return (f"String pool: {stats['unique']} unique of {stats['lookups']} strings, "
+            f"{stats['hit_rate']:.1%} duplicates ({stats['duplicate_bytes']} bytes not decoded again)")
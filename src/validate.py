@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from wmset import MIN_FILE_SIZE, OFFSET_TABLE_SIZE, SCRIPT_SECTIONS, SECTION_COUNT, TEXT_SECTIONS
+import struct
+import sys
+
+## The offset table and the 4 bytes of padding before the first section
+HEADER_SIZE = OFFSET_TABLE_SIZE + 4
+TIM_MAGIC = 0x10
+
+@dataclass
+class ValidationIssue:
+  section: Optional[int]
+  offset: int  # absolute offset in the file
+  message: str
+  severity: str = "error"
+
+  def __str__(self) -> str:
+    where = f"section {self.section}" if self.section is not None else "header"
+    return f"{self.severity}: {where} @ 0x{self.offset:06x}: {self.message}"
+
+
+@dataclass(init=False)
+class Validator:
+  """
+  Structural checks on a wmset file that only read offsets, counts and size fields.
+  Nothing is decoded, so a file validates in well under a millisecond.
+  """
+  data: memoryview
+  issues: List[ValidationIssue]
+
+  def __init__(self, data: bytes):
+    self.data = memoryview(data)
+    self.issues = []
+
+  def error(self, section: Optional[int], offset: int, message: str) -> None:
+    self.issues.append(ValidationIssue(section, offset, message))
+
+  def warning(self, section: Optional[int], offset: int, message: str) -> None:
+    ## Things the parsers already tolerate, retail files trip some of these
+    self.issues.append(ValidationIssue(section, offset, message, "warning"))
+
+  def validate(self) -> List[ValidationIssue]:
+    if len(self.data) < MIN_FILE_SIZE:
+      self.error(None, 0, f"file is {len(self.data)} bytes, expected at least {MIN_FILE_SIZE}")
+      if len(self.data) < HEADER_SIZE:
+        return self.issues
+
+    spans = self.check_header()
+    if spans is None:
+      return self.issues
+
+    for index in SCRIPT_SECTIONS:
+      self.check_scripts(index, *spans[index])
+    for index in TEXT_SECTIONS:
+      self.check_text(index, *spans[index])
+    self.check_models(15, *spans[15])
+    self.check_draw_points(34, *spans[34])
+    self.check_textures(41, *spans[41])
+    return self.issues
+
+  def check_header(self) -> Optional[List[Tuple[int, int]]]:
+    offsets = struct.unpack_from(f"<{SECTION_COUNT}I", self.data, 0)
+    size = len(self.data)
+    valid = True
+    if offsets[0] != HEADER_SIZE:
+      self.warning(None, 0, f"first section starts at {offsets[0]}, expected {HEADER_SIZE}")
+    for i, offset in enumerate(offsets):
+      if offset > size:
+        self.error(None, i * 4, f"offset {i} ({offset}) is past the end of the file ({size})")
+        valid = False
+      elif i and offset < offsets[i - 1]:
+        self.error(None, i * 4, f"offset {i} ({offset}) is before offset {i - 1} ({offsets[i - 1]})")
+        valid = False
+
+    if not valid:
+      return None
+    ends = list(offsets[1:]) + [size]
+    return list(zip(offsets, ends))
+
+  def read_offset_table(self, section: int, start: int, end: int, padded: bool = False) -> Optional[List[int]]:
+    """
+    Zero terminated table of 4 byte entries at the start of a section, relative to the section.
+    Padded tables (Section15) hold a uint16 offset and a uint16 that should be 0.
+    Returns None if the terminator is missing.
+    """
+    offsets: List[int] = []
+    position = start
+    while position + 4 <= end:
+      if padded:
+        offset, padding = struct.unpack_from("<HH", self.data, position)
+        if offset and padding:
+          ## Section15 skips these entries, so do the same
+          self.warning(section, position + 2, f"offset table padding is {padding}, expected 0, entry ignored")
+          position += 4
+          continue
+      else:
+        (offset,) = struct.unpack_from("<I", self.data, position)
+      if offset == 0:
+        return offsets
+      offsets.append(offset)
+      position += 4
+
+    self.error(section, start, "offset table has no zero terminator before the end of the section")
+    return None
+
+  def check_relative_offsets(self, section: int, start: int, end: int, offsets: List[int], what: str) -> bool:
+    table_end = (len(offsets) + 1) * 4
+    size = end - start
+    valid = True
+    for i, offset in enumerate(offsets):
+      location = start + i * 4
+      if offset < table_end or offset >= size:
+        self.error(section, location, f"{what} {i} offset {offset} is outside the section data ({table_end}..{size})")
+        valid = False
+      elif i and offset < offsets[i - 1]:
+        self.error(section, location, f"{what} {i} offset {offset} is before {what} {i - 1} ({offsets[i - 1]})")
+        valid = False
+    return valid
+
+  def check_scripts(self, section: int, start: int, end: int) -> None:
+    offsets = self.read_offset_table(section, start, end)
+    if offsets is None:
+      return
+    table_end = (len(offsets) + 1) * 4
+    for i, offset in enumerate(offsets):
+      ## Entities can share script data, so only bounds matter here
+      if offset < table_end or offset + 2 > end - start:
+        self.error(section, start + i * 4, f"script {i} offset {offset} is outside the section ({table_end}..{end - start})")
+
+  def check_text(self, section: int, start: int, end: int) -> None:
+    offsets = self.read_offset_table(section, start, end)
+    if offsets is not None:
+      self.check_relative_offsets(section, start, end, offsets, "string")
+
+  def check_draw_points(self, section: int, start: int, end: int) -> None:
+    size = end - start
+    if size < 44:
+      self.error(section, start, f"section is {size} bytes, expected at least the 44 byte header")
+    elif (size - 44) % 4:
+      self.error(section, start + 44, f"draw point data is {size - 44} bytes, not a multiple of 4")
+
+  def check_models(self, section: int, start: int, end: int) -> None:
+    offsets = self.read_offset_table(section, start, end, padded=True)
+    if offsets is None or not self.check_relative_offsets(section, start, end, offsets, "model"):
+      return
+
+    chunk_ends = offsets[1:] + [end - start]
+    for i, (offset, chunk_end) in enumerate(zip(offsets, chunk_ends)):
+      chunk_start = start + offset
+      chunk_size = chunk_end - offset
+      if chunk_size < 8:
+        self.error(section, chunk_start, f"model {i} is {chunk_size} bytes, too small for its header")
+        continue
+      triangles, quads, _texture_page, vertices = struct.unpack_from("<4H", self.data, chunk_start)
+      needed = 8 + triangles * 12 + quads * 16 + vertices * 8
+      if needed > chunk_size:
+        self.error(section, chunk_start, f"model {i} needs {needed} bytes for {triangles} triangles, {quads} quads and {vertices} vertices but has {chunk_size}")
+
+  def check_textures(self, section: int, start: int, end: int) -> None:
+    offsets = self.read_offset_table(section, start, end)
+    if offsets is None or not self.check_relative_offsets(section, start, end, offsets, "texture"):
+      return
+
+    chunk_ends = offsets[1:] + [end - start]
+    for i, (offset, chunk_end) in enumerate(zip(offsets, chunk_ends)):
+      self.check_tim(section, i, start + offset, start + chunk_end)
+
+  def check_tim(self, section: int, index: int, start: int, end: int) -> None:
+    if end - start < 8:
+      self.error(section, start, f"texture {index} is {end - start} bytes, too small for a TIM header")
+      return
+    magic, flags = struct.unpack_from("<II", self.data, start)
+    if magic != TIM_MAGIC:
+      self.error(section, start, f"texture {index} has magic 0x{magic:08x}, expected 0x{TIM_MAGIC:08x}")
+      return
+    bpp = flags & 0x03
+    has_palette = bool((flags >> 3) & 1)
+    if has_palette and bpp > 1:
+      self.error(section, start + 4, f"texture {index} has a palette but bpp mode {bpp}")
+      return
+
+    position = start + 8
+    blocks = ["palette", "image"] if has_palette else ["image"]
+    for block in blocks:
+      if position + 12 > end:
+        self.error(section, position, f"texture {index} {block} header runs past the end of the texture")
+        return
+      block_size, _x, _y, width, height = struct.unpack_from("<I4H", self.data, position)
+      if block_size < 12 or position + block_size > end:
+        self.error(section, position, f"texture {index} {block} size {block_size} does not fit in the {end - position} bytes left")
+        return
+      ## Width is in 16-bit VRAM units for both blocks
+      if block_size - 12 < width * height * 2:
+        self.error(section, position, f"texture {index} {block} is {width}x{height} but only holds {block_size - 12} bytes of data")
+      position += block_size
+
+
+def validate(data: bytes) -> List[ValidationIssue]:
+  return Validator(data).validate()
+
+
+def validate_file(filepath: str) -> List[ValidationIssue]:
+  with open(filepath, "rb") as f:
+    return validate(f.read())
+
+
+if __name__ == "__main__":
+  failed = 0
+  for path in sys.argv[1:]:
+    issues = validate_file(path)
+    for issue in issues:
+      print(f"{path}: {issue}")
+    if any(issue.severity == "error" for issue in issues):
+      failed += 1
+  print(f"{len(sys.argv) - 1 - failed} of {len(sys.argv) - 1} file(s) valid")
+  sys.exit(1 if failed else 0)
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+from file_header import MIN_FILE_SIZE, OFFSET_TABLE_SIZE, SECTION_COUNT, FileHeader
+from sections.registry import SECTION_PARSERS
+from utils.string_pool import StringPool
+import os
+
+SCRIPT_SECTIONS = (7, 9, 11, 36)
+TEXT_SECTIONS = (13, 31)
+## Parsers that take hardened=True, the others are linear in their size already
+HARDENED_SECTIONS = SCRIPT_SECTIONS + (15, 41)
+
+@dataclass(init=False)
+class WmsetFile:
+  """
+  A wmset file whose sections are only parsed the first time they are asked for.
+  Reading the file and splitting it into sections is all that happens up front.
+  Pass the same string_pool to several files to decode repeated strings only once.
+  hardened bounds parsing work by the file size and rejects size fields that do not fit,
+  for files from untrusted sources.
+  """
+  path: str
+  header: FileHeader
+  string_pool: Optional[StringPool]
+  hardened: bool
+
+  def __init__(self, path: str, string_pool: Optional[StringPool] = None, hardened: bool = False):
+    if not os.path.exists(path):
+      raise FileNotFoundError(f"File {path} does not exist")
+
+    with open(path, "rb") as f:
+      file_data = f.read()
+    self._load(path, file_data, string_pool, hardened)
+
+  @classmethod
+  def from_bytes(cls, file_data: bytes, path: str = "<memory>", string_pool: Optional[StringPool] = None, hardened: bool = False) -> "WmsetFile":
+    """For data that never touches the disk, e.g. an uploaded mod file."""
+    wmset = cls.__new__(cls)
+    wmset._load(path, file_data, string_pool, hardened)
+    return wmset
+
+  def _load(self, path: str, file_data: bytes, string_pool: Optional[StringPool], hardened: bool) -> None:
+    if len(file_data) < MIN_FILE_SIZE:
+      raise ValueError(f"File too short: {len(file_data)} bytes")
+
+    self.path = path
+    self.string_pool = string_pool
+    self.hardened = hardened
+    self.header = FileHeader(file_data, verbose=False)
+    self._parsed: Dict[int, Any] = {}
+
+  def section(self, index: int) -> Any:
+    """Parsed section, zero indexed like FileHeader.sections."""
+    if index not in self._parsed:
+      if index not in SECTION_PARSERS:
+        raise KeyError(f"No parser for section {index}")
+      if index in TEXT_SECTIONS and self.string_pool is not None:
+        self._parsed[index] = SECTION_PARSERS[index](self.header.sections[index], string_pool=self.string_pool)
+      elif index in HARDENED_SECTIONS and self.hardened:
+        self._parsed[index] = SECTION_PARSERS[index](self.header.sections[index], hardened=True)
+      else:
+        self._parsed[index] = SECTION_PARSERS[index](self.header.sections[index])
+    return self._parsed[index]
+
+  @cached_property
+  def section_hashes(self) -> List[str]:
+    return self.header.section_hashes()
+
+  def is_parsed(self, index: int) -> bool:
+    return index in self._parsed
+
+  def scripts(self, index: int) -> Any:
+    if index not in SCRIPT_SECTIONS:
+      raise KeyError(f"Section {index} is not a script section, expected one of {SCRIPT_SECTIONS}")
+    return self.section(index)
+
+  @property
+  def dialog(self) -> List[str]:
+    return self.section(13).dialog
+
+  @property
+  def models(self) -> Any:
+    return self.section(15)
+
+  @property
+  def location_names(self) -> List[str]:
+    return self.section(31).location_names
+
+  @property
+  def draw_points(self) -> List[Any]:
+    return self.section(34).draw_points
+
+  @property
+  def textures(self) -> Any:
+    return self.section(41)
+
+
+def open_wmset(path: str, string_pool: Optional[StringPool] = None, hardened: bool = False) -> WmsetFile:
+  return WmsetFile(path, string_pool, hardened)